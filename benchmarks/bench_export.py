@@ -0,0 +1,99 @@
+"""
+Benchmark streaming export: time and peak Python memory for each format,
+plain and gzipped, against a fetchall-based CSV export.
+
+Usage: python benchmarks/bench_export.py [cards]
+"""
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import EXPORT_COLUMNS, export_cards  # noqa: E402
+from load_db import TIMESTAMP_FORMAT  # noqa: E402
+from migrations import migrate  # noqa: E402
+from replica import connect_readonly  # noqa: E402
+
+
+def build_database(db_path, cards, seed=1):
+    """Create a database of cards with scheduling state spread over 50 decks."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    migrate(conn, progress=lambda message: None)
+    now = datetime.now()
+    # Card i uses terms 2i + 1 and 2i + 2
+    conn.executemany('INSERT INTO terms (id, text) VALUES (?, ?)', (
+        (2 * i + side + 1, (f"parola {i}", f"word {i}")[side]) for i in range(cards) for side in (0, 1)
+    ))
+    conn.executemany('''
+        INSERT INTO flashcards (target_term_id, native_term_id, last_displayed, last_correct, correct_count,
+                                deck, due_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        (2 * i + 1, 2 * i + 2, (now - timedelta(days=rng.randrange(30))).isoformat(), None,
+         rng.randrange(6), f"deck {i % 50:02d}",
+         (now + timedelta(days=rng.randrange(60))).strftime(TIMESTAMP_FORMAT))
+        for i in range(cards)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def fetchall_export(conn, path):
+    """The ad-hoc approach: read every row into memory, then write."""
+    rows = conn.execute('SELECT ' + ', '.join(EXPORT_COLUMNS) + ' FROM flashcards_with_text ORDER BY id').fetchall()
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(rows)
+    return len(rows)
+
+
+def measure(func):
+    """Run func once for time and once under tracemalloc for peak memory."""
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    cards = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        start = time.perf_counter()
+        build_database(db_path, cards)
+        print(f"Built {cards} cards in {time.perf_counter() - start:.1f}s\n")
+
+        conn = connect_readonly(db_path)
+        runs = [("fetchall csv", "all.csv", lambda path: fetchall_export(conn, path))]
+        for name in ("cards.csv", "cards.jsonl", "cards.txt"):
+            for suffix in ("", ".gz"):
+                runs.append((f"stream {name + suffix}", name + suffix,
+                             lambda path: export_cards(conn, path)))
+
+        print(f"{'Export':<24} {'Cards':>9} {'Seconds':>8} {'Cards/s':>10} {'Peak MiB':>9} {'File MiB':>9}")
+        print("-" * 74)
+        for name, file_name, export in runs:
+            path = os.path.join(directory, file_name)
+            count, elapsed, peak = measure(lambda: export(path))
+            print(f"{name:<24} {count:>9} {elapsed:>8.2f} {count / elapsed:>10.0f} "
+                  f"{peak / 2 ** 20:>9.1f} {os.path.getsize(path) / 2 ** 20:>9.1f}")
+            os.remove(path)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark CSV import and storage: cards holding their own text columns with
+the original per-row exact-match import, against cards referring to
+interned terms with the hash-deduplicated import in load_db. Both dedup
+within each deck, so both store the same cards.
+
+After importing, it times single-card lookups by word pair (the query
+dedup and sync run) and reading whole decks with their words.
+
+Usage: python benchmarks/bench_import.py [decks] [cards_per_deck]
+"""
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_db import import_from_csv  # noqa: E402
+from migrations import migrate  # noqa: E402
+from terms import TermStore, content_hash  # noqa: E402
+
+
+def make_decks(directory, decks, cards_per_deck, vocabulary_size=20000, seed=1):
+    """Write overlapping decks drawn from one vocabulary, some with case/spacing variants."""
+    rng = random.Random(seed)
+    vocabulary = [(f"parola{i}", f"word {i}") for i in range(vocabulary_size)]
+    paths = []
+    for deck in range(decks):
+        path = os.path.join(directory, f"deck_{deck:02d}.csv")
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(["target_word", "native_word"])
+            for target, native in rng.sample(vocabulary, cards_per_deck):
+                if rng.random() < 0.2:
+                    target, native = target.capitalize(), native.replace(' ', '  ')
+                writer.writerow([target, native])
+        paths.append(path)
+    return paths
+
+
+def legacy_import(conn, csv_file_path):
+    """The original import: one SELECT and one INSERT per row, exact-match dedup within the deck."""
+    deck = os.path.splitext(os.path.basename(csv_file_path))[0]
+    cursor = conn.cursor()
+    counter = 0
+    with open(csv_file_path, 'r', encoding='utf-8') as csv_file:
+        csv_reader = csv.reader(csv_file)
+        next(csv_reader, None)
+        for row in csv_reader:
+            target_word, native_word = row[0].strip(), row[1].strip()
+            cursor.execute(
+                "SELECT id FROM flashcards WHERE target_word = ? AND native_word = ? AND deck = ?",
+                (target_word, native_word, deck)
+            )
+            if not cursor.fetchone():
+                cursor.execute('''
+                INSERT INTO flashcards (target_word, native_word, last_displayed, last_correct, correct_count, deck)
+                VALUES (?, ?, NULL, NULL, 0, ?)
+                ''', (target_word, native_word, deck))
+                counter += 1
+    conn.commit()
+    return counter
+
+
+def database_size(db_path):
+    """Return the file size and the bytes used by cards and terms with their indexes (via dbstat)."""
+    conn = sqlite3.connect(db_path)
+    conn.execute('VACUUM')
+    card_bytes = conn.execute('''
+        SELECT SUM(pgsize) FROM dbstat
+        WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name IN ('flashcards', 'terms'))
+    ''').fetchone()[0]
+    conn.close()
+    return os.path.getsize(db_path), card_bytes
+
+
+def read_decks(conn, table, paths):
+    """Read every deck's cards with their words, as loading a review session does; return ms."""
+    started = time.perf_counter()
+    for path in paths:
+        deck = os.path.splitext(os.path.basename(path))[0]
+        conn.execute(f'''
+            SELECT id, target_word, native_word, last_displayed, last_correct, correct_count, due_date
+            FROM {table} WHERE deck = ?
+        ''', (deck,)).fetchall()
+    return (time.perf_counter() - started) * 1000
+
+
+def text_lookup(conn, deck, target_word, native_word):
+    return conn.execute(
+        "SELECT id FROM flashcards WHERE target_word = ? AND native_word = ? AND deck = ?",
+        (target_word, native_word, deck)
+    ).fetchone()
+
+
+def hash_lookup(conn, deck, target_word, native_word):
+    return conn.execute(
+        "SELECT id FROM flashcards WHERE content_hash = ? AND deck = ?",
+        (content_hash(target_word, native_word), deck)
+    ).fetchone()
+
+
+def lookup_cards(conn, lookup, paths, count=20000, seed=2):
+    """Look up random cards of the decks by word pair; return ms."""
+    rng = random.Random(seed)
+    rows = []
+    for path in paths:
+        deck = os.path.splitext(os.path.basename(path))[0]
+        with open(path, 'r', encoding='utf-8') as file:
+            rows.extend((deck, row[0], row[1]) for row in list(csv.reader(file))[1:])
+    rows = [rng.choice(rows) for _ in range(count)]
+    started = time.perf_counter()
+    for deck, target_word, native_word in rows:
+        if lookup(conn, deck, target_word, native_word) is None:
+            raise AssertionError(f"card not found: {deck} {target_word} {native_word}")
+    return (time.perf_counter() - started) * 1000
+
+
+def run(label, db_path, paths, total_rows, schema_version, importer, lookup, table):
+    conn = sqlite3.connect(db_path)
+    migrate(conn, target=schema_version, progress=lambda message: None)
+    started = time.perf_counter()
+    imported = importer(conn, paths)
+    elapsed = time.perf_counter() - started
+    conn.close()
+    size, card_bytes = database_size(db_path)
+    conn = sqlite3.connect(db_path)
+    lookup_ms = lookup_cards(conn, lookup, paths)
+    read_ms = read_decks(conn, table, paths)
+    conn.close()
+    print(f"{label:<10} {imported:>9,} cards stored  {elapsed:>7.2f}s  "
+          f"{total_rows / elapsed:>9,.0f} rows/s  {card_bytes / 1024:>9,.0f} KiB  {size / 1024:>9,.0f} KiB  "
+          f"{lookup_ms:>8.1f} ms  {read_ms:>8.1f} ms")
+
+
+def main():
+    decks = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cards_per_deck = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_decks(directory, decks, cards_per_deck)
+        total_rows = decks * cards_per_deck
+        print(f"{decks} decks x {cards_per_deck:,} rows")
+        print(f"{'':<10} {'':>9} {'':>12}  {'import':>7}  {'':>16}  {'cards+terms':>13}  {'file':>13}  "
+              f"{'20k lookups':>8}  {'read decks':>8}")
+
+        run("text", os.path.join(directory, "text.db"), paths, total_rows, 3,
+            lambda conn, paths: sum(legacy_import(conn, path) for path in paths), text_lookup, "flashcards")
+
+        def interned(conn, paths):
+            term_store = TermStore(conn)
+            return sum(import_from_csv(conn, path, term_store=term_store) for path in paths)
+
+        run("interned", os.path.join(directory, "interned.db"), paths, total_rows, None, interned,
+            hash_lookup, "flashcards_with_text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark main.py's quick-study mode against the old pandas implementation.
+
+Measures, for decks of several sizes:
+- time to the first card: the old code read the whole CSV with pandas and
+  converted it to a list of dicts; the new code reads INITIAL_CARDS rows
+- time to stream the whole file into the CardPool
+- time per known card: the old code picked with random.randint and removed
+  with del (O(n) shifting); the new pool swap-removes in O(1)
+
+The old load is only timed if pandas is installed; the old pick/remove is
+timed on the same list of dicts built with csv.DictReader.
+
+Usage: python benchmarks/bench_quick_study.py [sizes...] (default 1000 100000 1000000)
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import CardPool, QuickStudyApp  # noqa: E402
+
+
+RETIRED = 10000  # Known cards removed per measurement
+
+
+def write_deck(path, cards):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Italian', 'English'])
+        writer.writerows((f"parola{i}", f"word {i}") for i in range(cards))
+
+
+def old_load(path):
+    """The old main.py start-up: pandas.read_csv(...).to_dict(orient="records")."""
+    import pandas
+    return pandas.read_csv(path).to_dict(orient="records")
+
+
+def old_retire(word_dict, count, rng):
+    """The old main.py known-card path: random.randint, then del word_dict[word_index]."""
+    start = time.perf_counter()
+    for _ in range(min(count, len(word_dict))):
+        word_index = rng.randint(0, len(word_dict) - 1)
+        del word_dict[word_index]
+    return time.perf_counter() - start
+
+
+def new_first_card(path):
+    """Open the deck and read the rows QuickStudyApp reads before its first card."""
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        rows = csv.reader(file)
+        next(rows)
+        pool = CardPool()
+        pool.extend(rows, QuickStudyApp.INITIAL_CARDS)
+        pool.card(pool.pick())
+
+
+def new_load(path):
+    """Stream the whole file into a CardPool in LOAD_CHUNK pieces, as the app does."""
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        rows = csv.reader(file)
+        next(rows)
+        pool = CardPool()
+        while pool.extend(rows, QuickStudyApp.LOAD_CHUNK) == QuickStudyApp.LOAD_CHUNK:
+            pass
+    return pool
+
+
+def new_retire(pool, count, rng):
+    start = time.perf_counter()
+    for _ in range(min(count, len(pool))):
+        pool.retire(pool.pick(rng))
+    return time.perf_counter() - start
+
+
+def elapsed_ms(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [1000, 100000, 1000000]
+    try:
+        import pandas  # noqa: F401
+        have_pandas = True
+    except ImportError:
+        have_pandas = False
+        print("pandas is not installed; the old start-up time is not measured\n")
+
+    print(f"{'Cards':>9} {'Old first card ms':>18} {'New first card ms':>18} {'New full load ms':>17} "
+          f"{'Old us/known':>13} {'New us/known':>13}")
+    print("-" * 93)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f"deck_{size}.csv")
+            write_deck(path, size)
+
+            old_ms = f"{elapsed_ms(old_load, path)[0]:.1f}" if have_pandas else "n/a"
+            first_ms, _ = elapsed_ms(new_first_card, path)
+            load_ms, pool = elapsed_ms(new_load, path)
+
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                word_dict = list(csv.DictReader(file))
+            retired = min(RETIRED, size)
+            old_us = old_retire(word_dict, retired, random.Random(1)) / retired * 1e6
+            new_us = new_retire(pool, retired, random.Random(1)) / retired * 1e6
+
+            print(f"{size:>9} {old_ms:>18} {first_ms:>18.2f} {load_ms:>17.1f} {old_us:>13.2f} {new_us:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
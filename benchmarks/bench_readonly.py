@@ -0,0 +1,165 @@
+"""
+Benchmark answer-commit latency while a full-deck report runs.
+
+Compares reports on a read-write connection to a rollback-journal database
+(the old setup) with reports on a read-only connection to a WAL database
+and on an in-memory AnalyticsSnapshot. WAL answers commit with
+synchronous=NORMAL as the application does; one run with synchronous=FULL
+shows the cost of an fsync per answer.
+
+Commit times depend on the storage: set TMPDIR to a directory on the disk
+the database will live on (the default may be a tmpfs, where fsync is free).
+
+Usage: python benchmarks/bench_readonly.py [cards] [seconds]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from statistics import median, quantiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deck_stats import compute_deck_stats  # noqa: E402
+from load_db import TIMESTAMP_FORMAT, forecast_workload, next_review_state, save_review_states  # noqa: E402
+from migrations import migrate  # noqa: E402
+from replica import AnalyticsSnapshot, connect_readonly  # noqa: E402
+
+
+DECKS = 20
+
+
+def build_database(db_path, cards, seed=1):
+    """Create a database with cards spread over decks and due dates, plus a review history."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    migrate(conn, progress=lambda message: None)
+    today = datetime.now()
+    # Card i uses terms 2i + 1 and 2i + 2
+    conn.executemany('INSERT INTO terms (id, text) VALUES (?, ?)', (
+        (2 * i + side + 1, (f"parola{i}", f"word {i}")[side]) for i in range(cards) for side in (0, 1)
+    ))
+    conn.executemany('''
+        INSERT INTO flashcards (target_term_id, native_term_id, correct_count, deck, due_date)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (
+        (2 * i + 1, 2 * i + 2, rng.randrange(6), f"deck_{i % DECKS:02d}",
+         (today + timedelta(days=rng.randrange(-5, 60))).strftime(TIMESTAMP_FORMAT))
+        for i in range(cards)
+    ))
+    conn.executemany('''
+        INSERT INTO reviews (card_id, reviewed_at, correct, latency_ms) VALUES (?, ?, ?, ?)
+    ''', (
+        (rng.randrange(1, cards + 1), (today - timedelta(minutes=i)).isoformat(),
+         rng.random() < 0.7, rng.randrange(500, 6000))
+        for i in range(cards)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def full_report(conn):
+    """Everything the statistics screens read, for every deck, with full scans."""
+    compute_deck_stats(conn)
+    forecast_workload(conn, days=30)
+    conn.execute('''
+        SELECT f.deck, COUNT(*), AVG(r.latency_ms), SUM(r.correct)
+        FROM reviews r JOIN flashcards f ON f.id = r.card_id
+        GROUP BY f.deck
+    ''').fetchall()
+
+
+def answer_latencies(conn, cards, seconds, pause=0.005, seed=2):
+    """Commit answers one at a time for a while, as a session flushing every answer would.
+
+    Returns the commit time of each answer in ms.
+    """
+    rng = random.Random(seed)
+    rows = conn.execute('''
+        SELECT id, target_word, native_word, last_displayed, last_correct, correct_count, deck, due_date
+        FROM flashcards_with_text WHERE id <= ?
+    ''', (cards,)).fetchall()
+    keys = ('id', 'target_word', 'native_word', 'last_displayed', 'last_correct', 'correct_count',
+            'deck', 'due_date')
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        card = dict(zip(keys, rng.choice(rows)))
+        updated = next_review_state(card, rng.random() < 0.7)
+        start = time.perf_counter()
+        save_review_states(conn, [updated])
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(pause)
+    return latencies
+
+
+def run(db_path, seconds, journal_mode, synchronous, report_connect=None):
+    """Time answers with a report looping in another thread; return (latencies, reports run)."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    stop = threading.Event()
+    reports = [0]
+
+    def report_loop():
+        report_conn = report_connect()
+        while not stop.is_set():
+            full_report(report_conn)
+            reports[0] += 1
+
+    thread = None
+    if report_connect is not None:
+        thread = threading.Thread(target=report_loop)
+        thread.start()
+        time.sleep(0.2)  # Let the first report get going
+    try:
+        latencies = answer_latencies(conn, 5000, seconds)
+    finally:
+        stop.set()
+        if thread is not None:
+            thread.join()
+        conn.close()
+    return latencies, reports[0]
+
+
+def main():
+    cards = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        build_database(db_path, cards)
+
+        start = time.perf_counter()
+        conn = connect_readonly(db_path)
+        full_report(conn)
+        conn.close()
+        print(f"{cards} cards; one full-deck report takes {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+        snapshot = AnalyticsSnapshot(db_path, max_age=3600)
+        scenarios = [
+            ("rollback journal, no report", "DELETE", "FULL", None),
+            ("rollback journal, read-write report", "DELETE", "FULL",
+             lambda: sqlite3.connect(db_path, timeout=30)),
+            ("WAL, synchronous=FULL, no report", "WAL", "FULL", None),
+            ("WAL, no report", "WAL", "NORMAL", None),
+            ("WAL, read-only report", "WAL", "NORMAL", lambda: connect_readonly(db_path)),
+            ("WAL, report on in-memory snapshot", "WAL", "NORMAL", snapshot.connection),
+        ]
+
+        print(f"{'Scenario':<38} {'Reports':>8} {'Answers':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        print("-" * 83)
+        for name, journal_mode, synchronous, report_connect in scenarios:
+            latencies, reports = run(db_path, seconds, journal_mode, synchronous, report_connect)
+            p95 = quantiles(latencies, n=20)[-1]
+            print(f"{name:<38} {reports:>8} {len(latencies):>8} "
+                  f"{median(latencies):>8.2f} {p95:>8.2f} {max(latencies):>8.2f}")
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark per-deck shards against the single-file layout.
+
+While a background thread imports a large CSV into one deck, the main
+thread commits answers in another deck. In a single flashcards.db the
+import holds the only write lock, so answers wait for it; with shards the
+two decks are separate files. Also times the cross-deck due count: one
+GROUP BY on the single file versus UNION ALL over attached shards.
+
+Usage: python benchmarks/bench_shards.py [import_cards] [decks] [cards_per_deck]
+"""
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from statistics import median, quantiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_db import TIMESTAMP_FORMAT, create_flashcards_db, import_from_csv, next_review_state, save_review_states  # noqa: E402
+from shards import ShardCatalog  # noqa: E402
+
+
+IMPORT_DECK = "import_deck"
+STUDY_DECK = "deck_00"
+
+
+def write_csv(path, cards):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['target_word', 'native_word'])
+        writer.writerows((f"nuova{i}", f"new word {i}") for i in range(cards))
+
+
+def fill_deck(conn, deck, cards, rng):
+    today = datetime.now()
+    # Card i uses terms base + 2i + 1 and base + 2i + 2
+    base = conn.execute('SELECT COALESCE(MAX(id), 0) FROM terms').fetchone()[0]
+    conn.executemany('INSERT INTO terms (id, text) VALUES (?, ?)', (
+        (base + 2 * i + side + 1, (f"{deck}_parola{i}", f"{deck} word {i}")[side])
+        for i in range(cards) for side in (0, 1)
+    ))
+    conn.executemany('''
+        INSERT INTO flashcards (target_term_id, native_term_id, correct_count, deck, due_date, content_hash)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        (base + 2 * i + 1, base + 2 * i + 2, rng.randrange(6), deck,
+         (today + timedelta(days=rng.randrange(-5, 60))).strftime(TIMESTAMP_FORMAT), f"{deck}:{i}")
+        for i in range(cards)
+    ))
+    conn.commit()
+
+
+def answer_latencies(conn, deck, stop, seed=2):
+    """Commit answers in one deck until stop is set; return each commit time in ms."""
+    rng = random.Random(seed)
+    keys = ('id', 'target_word', 'native_word', 'last_displayed', 'last_correct', 'correct_count',
+            'deck', 'due_date')
+    rows = conn.execute(f'SELECT {", ".join(keys)} FROM flashcards_with_text WHERE deck = ? LIMIT 2000',
+                        (deck,)).fetchall()
+    latencies = []
+    while not stop.is_set():
+        card = dict(zip(keys, rng.choice(rows)))
+        start = time.perf_counter()
+        save_review_states(conn, [next_review_state(card, rng.random() < 0.7)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.005)
+    return latencies
+
+
+def run(study_path, import_path, csv_path):
+    """Answer cards in the study database while importing into the import database."""
+    stop = threading.Event()
+    elapsed = [0.0]
+
+    def import_job():
+        conn = create_flashcards_db(import_path)
+        start = time.perf_counter()
+        import_from_csv(conn, csv_path, deck=IMPORT_DECK)
+        elapsed[0] = time.perf_counter() - start
+        conn.close()
+        stop.set()
+
+    conn = sqlite3.connect(study_path, timeout=60)
+    thread = threading.Thread(target=import_job)
+    thread.start()
+    try:
+        latencies = answer_latencies(conn, STUDY_DECK, stop)
+    finally:
+        thread.join()
+        conn.close()
+    return latencies, elapsed[0]
+
+
+def time_ms(function, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    import_cards = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    decks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    cards_per_deck = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "import.csv")
+        write_csv(csv_path, import_cards)
+
+        single_path = os.path.join(directory, "flashcards.db")
+        conn = create_flashcards_db(single_path)
+        catalog = ShardCatalog(os.path.join(directory, "catalog.db"), os.path.join(directory, "shards"))
+        for index in range(decks):
+            deck = f"deck_{index:02d}"
+            fill_deck(conn, deck, cards_per_deck, rng)
+            shard = catalog.connect(deck)
+            fill_deck(shard, deck, cards_per_deck, rng)
+            shard.close()
+        conn.close()
+
+        print(f"{decks} decks x {cards_per_deck} cards; importing {import_cards} cards into another deck "
+              f"while answering in {STUDY_DECK}\n")
+        print(f"{'Layout':<14} {'Import s':>9} {'Answers':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>9}")
+        print("-" * 61)
+        layouts = [
+            ("single file", single_path, single_path),
+            ("shards", catalog.shard_path(STUDY_DECK), catalog.create_shard(IMPORT_DECK)),
+        ]
+        for name, study_path, import_path in layouts:
+            latencies, seconds = run(study_path, import_path, csv_path)
+            p95 = quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            print(f"{name:<14} {seconds:>9.2f} {len(latencies):>8} "
+                  f"{median(latencies):>8.2f} {p95:>8.2f} {max(latencies):>9.2f}")
+
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        conn = sqlite3.connect(single_path)
+        single_ms = time_ms(lambda: conn.execute(
+            'SELECT deck, COUNT(*) FROM flashcards WHERE due_date IS NULL OR due_date <= ? GROUP BY deck',
+            (now,)).fetchall())
+        conn.close()
+        sharded_ms = time_ms(catalog.due_counts)
+        stats_ms = time_ms(catalog.deck_stats)
+        print(f"\nCross-deck due counts: single file {single_ms:.1f} ms, "
+              f"UNION ALL over {len(catalog.decks())} shards {sharded_ms:.1f} ms "
+              f"(attached {catalog.attach_limit} at a time)")
+        print(f"Cross-deck statistics from deck_stats over shards: {stats_ms:.1f} ms")
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import sqlite3
 from datetime import datetime
+from load_db import SAMPLE_CARDS, SAMPLE_DECK
+from migrations import migrate
+from terms import TermStore, content_hash
 
 
 def create_flashcards_db(db_path='flashcards.db'):
@@ -14,27 +17,10 @@ def create_flashcards_db(db_path='flashcards.db'):
     """
     # Connect to database (will create it if it doesn't exist)
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
 
-    # Create the flashcards table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS flashcards (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        target_word TEXT NOT NULL,          -- Word in the language being learned
-        native_word TEXT NOT NULL,          -- Translation in native language
-        last_displayed TIMESTAMP,           -- Last time the card was shown
-        last_correct TIMESTAMP,             -- Last time user answered correctly
-        correct_count INTEGER DEFAULT 0,    -- Number of times answered correctly
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-
-    # Create indexes for better performance
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_target ON flashcards(target_word)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_last_displayed ON flashcards(last_displayed)')
-
-    # Commit changes and return connection
-    conn.commit()
+    # Create or upgrade the tables and indexes
+    migrate(conn)
+
     return conn
 
 
@@ -45,18 +31,17 @@ def add_sample_flashcards(conn):
     Parameters:
     conn (sqlite3.Connection): Database connection
     """
-    sample_cards = [
-        ('hola', 'hello', None, None, 0),
-        ('gracias', 'thank you', None, None, 0),
-        ('por favor', 'please', None, None, 0),
-        ('adiós', 'goodbye', None, None, 0)
-    ]
-
+    term_store = TermStore(conn)
     cursor = conn.cursor()
     cursor.executemany('''
-    INSERT INTO flashcards (target_word, native_word, last_displayed, last_correct, correct_count)
-    VALUES (?, ?, ?, ?, ?)
-    ''', sample_cards)
+    INSERT INTO flashcards (deck, target_term_id, native_term_id, content_hash, last_displayed, last_correct,
+                            correct_count)
+    VALUES (?, ?, ?, ?, NULL, NULL, 0)
+    ''', [
+        (SAMPLE_DECK, term_store.term_id(target_word), term_store.term_id(native_word),
+         content_hash(target_word, native_word))
+        for target_word, native_word in SAMPLE_CARDS
+    ])
 
     conn.commit()
 
@@ -70,7 +55,7 @@ def main():
 
     # Query to verify data
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM flashcards')
+    cursor.execute('SELECT * FROM flashcards_with_text')
     rows = cursor.fetchall()
 
     print(f"{'ID':<3} {'Target Word':<15} {'Native Word':<15} {'Correct Count':<15}")
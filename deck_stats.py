@@ -0,0 +1,325 @@
+import random
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+from replica import connect_readonly
+
+
+# correct_count values at or above this share the top ("mastered") bucket
+MAX_BUCKET = 5
+
+# Triggers that keep deck_stats and deck_bucket_stats in step with
+# flashcards and reviews. Cards without a deck are counted under ''.
+# deck_review_days (schema version 13) lists the days each deck was studied.
+TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_deck_stats_insert AFTER INSERT ON flashcards
+    BEGIN
+        INSERT INTO deck_stats (deck, cards) VALUES (COALESCE(NEW.deck, ''), 1)
+            ON CONFLICT (deck) DO UPDATE SET cards = cards + 1;
+        INSERT INTO deck_bucket_stats (deck, bucket, cards)
+            VALUES (COALESCE(NEW.deck, ''), MIN(COALESCE(NEW.correct_count, 0), {max_bucket}), 1)
+            ON CONFLICT (deck, bucket) DO UPDATE SET cards = cards + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_deck_stats_delete AFTER DELETE ON flashcards
+    BEGIN
+        UPDATE deck_stats SET cards = cards - 1 WHERE deck = COALESCE(OLD.deck, '');
+        UPDATE deck_bucket_stats SET cards = cards - 1
+            WHERE deck = COALESCE(OLD.deck, '')
+              AND bucket = MIN(COALESCE(OLD.correct_count, 0), {max_bucket});
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_deck_stats_update AFTER UPDATE OF correct_count, deck ON flashcards
+    WHEN COALESCE(OLD.deck, '') != COALESCE(NEW.deck, '')
+      OR MIN(COALESCE(OLD.correct_count, 0), {max_bucket}) != MIN(COALESCE(NEW.correct_count, 0), {max_bucket})
+    BEGIN
+        UPDATE deck_stats SET cards = cards - 1 WHERE deck = COALESCE(OLD.deck, '');
+        INSERT INTO deck_stats (deck, cards) VALUES (COALESCE(NEW.deck, ''), 1)
+            ON CONFLICT (deck) DO UPDATE SET cards = cards + 1;
+        UPDATE deck_bucket_stats SET cards = cards - 1
+            WHERE deck = COALESCE(OLD.deck, '')
+              AND bucket = MIN(COALESCE(OLD.correct_count, 0), {max_bucket});
+        INSERT INTO deck_bucket_stats (deck, bucket, cards)
+            VALUES (COALESCE(NEW.deck, ''), MIN(COALESCE(NEW.correct_count, 0), {max_bucket}), 1)
+            ON CONFLICT (deck, bucket) DO UPDATE SET cards = cards + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_deck_stats_review AFTER INSERT ON reviews
+    BEGIN
+        INSERT INTO deck_stats (deck, cards)
+            VALUES (COALESCE((SELECT deck FROM flashcards WHERE id = NEW.card_id), ''), 0)
+            ON CONFLICT (deck) DO NOTHING;
+        INSERT INTO deck_review_days (deck, day)
+            VALUES (COALESCE((SELECT deck FROM flashcards WHERE id = NEW.card_id), ''), date(NEW.reviewed_at))
+            ON CONFLICT (deck, day) DO NOTHING;
+        -- Reviews can arrive late (batched writes, sync), so the streak is the
+        -- run of days ending at the latest review day, not at this review
+        UPDATE deck_stats
+        SET reviews = reviews + 1,
+            correct_reviews = correct_reviews + NEW.correct,
+            streak_days = CASE
+                WHEN last_review_day = date(NEW.reviewed_at) THEN streak_days
+                ELSE (
+                    SELECT CAST(julianday(MAX(d.day)) - julianday(MAX(CASE WHEN NOT EXISTS (
+                        SELECT 1 FROM deck_review_days p
+                        WHERE p.deck = d.deck AND p.day = date(d.day, '-1 day')
+                    ) THEN d.day END)) AS INTEGER) + 1
+                    FROM deck_review_days d WHERE d.deck = deck_stats.deck
+                )
+            END,
+            last_review_day = MAX(COALESCE(last_review_day, ''), date(NEW.reviewed_at))
+        WHERE deck = COALESCE((SELECT deck FROM flashcards WHERE id = NEW.card_id), '');
+    END
+    ''',
+]
+
+
+def create_deck_stats_triggers(conn):
+    """
+    Create the triggers that maintain the deck statistics tables.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    """
+    for trigger in TRIGGERS:
+        conn.execute(trigger.format(max_bucket=MAX_BUCKET))
+
+
+def _streak(days):
+    """Length of the run of consecutive days ending at the latest day in a sorted list."""
+    streak = 0
+    expected = None
+    for day in reversed(days):
+        current = date.fromisoformat(day)
+        if expected is not None and current != expected:
+            break
+        streak += 1
+        expected = current - timedelta(days=1)
+    return streak
+
+
+def compute_deck_stats(conn):
+    """
+    Compute the deck statistics from scratch with full scans.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    tuple: (decks, buckets) where decks maps deck to
+        (cards, reviews, correct_reviews, last_review_day, streak_days)
+        and buckets maps (deck, bucket) to a card count
+    """
+    decks = {}
+    for deck, cards in conn.execute(
+            "SELECT COALESCE(deck, ''), COUNT(*) FROM flashcards GROUP BY 1"):
+        decks[deck] = [cards, 0, 0, None, 0]
+
+    review_days = {}
+    for deck, day, reviews, correct in conn.execute('''
+            SELECT COALESCE(f.deck, ''), date(r.reviewed_at), COUNT(*), SUM(r.correct)
+            FROM reviews r JOIN flashcards f ON f.id = r.card_id
+            GROUP BY 1, 2 ORDER BY 1, 2
+            '''):
+        stats = decks.setdefault(deck, [0, 0, 0, None, 0])
+        stats[1] += reviews
+        stats[2] += correct
+        stats[3] = day
+        review_days.setdefault(deck, []).append(day)
+    for deck, days in review_days.items():
+        decks[deck][4] = _streak(days)
+
+    buckets = {}
+    for deck, bucket, cards in conn.execute('''
+            SELECT COALESCE(deck, ''), MIN(COALESCE(correct_count, 0), ?), COUNT(*)
+            FROM flashcards GROUP BY 1, 2
+            ''', (MAX_BUCKET,)):
+        buckets[(deck, bucket)] = cards
+
+    return {deck: tuple(stats) for deck, stats in decks.items()}, buckets
+
+
+def rebuild_deck_stats(conn):
+    """
+    Replace the stored deck statistics with freshly computed ones.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    """
+    decks, buckets = compute_deck_stats(conn)
+    conn.execute('DELETE FROM deck_stats')
+    conn.execute('DELETE FROM deck_bucket_stats')
+    # Migration 6 rebuilds the counters before version 13 adds deck_review_days
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'deck_review_days'").fetchone():
+        conn.execute('DELETE FROM deck_review_days')
+        conn.execute('''
+            INSERT OR IGNORE INTO deck_review_days (deck, day)
+            SELECT COALESCE(f.deck, ''), date(r.reviewed_at)
+            FROM reviews r JOIN flashcards f ON f.id = r.card_id
+        ''')
+    conn.executemany('''
+        INSERT INTO deck_stats (deck, cards, reviews, correct_reviews, last_review_day, streak_days)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [(deck,) + stats for deck, stats in decks.items()])
+    conn.executemany(
+        'INSERT INTO deck_bucket_stats (deck, bucket, cards) VALUES (?, ?, ?)',
+        [key + (cards,) for key, cards in buckets.items()]
+    )
+
+
+def check_deck_stats(conn, repair=True):
+    """
+    Compare the stored deck statistics with a full recount.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    repair (bool): Rebuild the stored statistics if any drift is found
+
+    Returns:
+    list: (deck, field, stored, actual) tuples for every mismatch
+    """
+    decks, buckets = compute_deck_stats(conn)
+    fields = ('cards', 'reviews', 'correct_reviews', 'last_review_day', 'streak_days')
+
+    stored_decks = {row[0]: row[1:] for row in conn.execute(
+        'SELECT deck, ' + ', '.join(fields) + ' FROM deck_stats')}
+    stored_buckets = {(deck, bucket): cards for deck, bucket, cards in conn.execute(
+        'SELECT deck, bucket, cards FROM deck_bucket_stats WHERE cards != 0')}
+
+    drift = []
+    for deck in sorted(set(decks) | set(stored_decks)):
+        actual = decks.get(deck, (0, 0, 0, None, 0))
+        stored = stored_decks.get(deck, (0, 0, 0, None, 0))
+        for field, stored_value, actual_value in zip(fields, stored, actual):
+            if stored_value != actual_value:
+                drift.append((deck, field, stored_value, actual_value))
+    for key in sorted(set(buckets) | set(stored_buckets)):
+        if stored_buckets.get(key, 0) != buckets.get(key, 0):
+            drift.append((key[0], f"bucket {key[1]}", stored_buckets.get(key, 0), buckets.get(key, 0)))
+
+    if drift and repair:
+        rebuild_deck_stats(conn)
+        conn.commit()
+    return drift
+
+
+def check_review_order(db_path, seed=None):
+    """
+    Replay a database's reviews in random order and check the counters against a recount.
+
+    Runs on an in-memory copy. Besides the saved reviews, three weeks of
+    reviews with gaps are added for one card per deck, so the streak
+    counter sees late reviews that extend, split and join runs of days.
+
+    Parameters:
+    db_path (str): Path to the SQLite database
+    seed (int): Random seed (random if None)
+
+    Returns:
+    list: (deck, field, stored, actual) tuples for every mismatch
+    """
+    rng = random.Random(seed)
+    source = connect_readonly(db_path)
+    conn = sqlite3.connect(':memory:')
+    try:
+        source.backup(conn)
+    finally:
+        source.close()
+
+    try:
+        reviews = conn.execute(
+            'SELECT card_id, reviewed_at, correct, latency_ms, direction FROM reviews').fetchall()
+        today = datetime.now().replace(hour=20, minute=0, second=0, microsecond=0)
+        for (card_id,) in conn.execute('SELECT MIN(id) FROM flashcards GROUP BY deck').fetchall():
+            for days_ago in range(21):
+                if rng.random() < 0.7:
+                    for _ in range(rng.randint(1, 3)):
+                        reviewed_at = today - timedelta(days=days_ago, minutes=rng.randrange(600))
+                        reviews.append((card_id, reviewed_at.isoformat(), rng.randint(0, 1), None, 'forward'))
+
+        conn.execute('DELETE FROM reviews')
+        rebuild_deck_stats(conn)
+        rng.shuffle(reviews)
+        conn.executemany('''
+            INSERT INTO reviews (card_id, reviewed_at, correct, latency_ms, direction)
+            VALUES (?, ?, ?, ?, ?)
+        ''', reviews)
+        return check_deck_stats(conn, repair=False)
+    finally:
+        conn.close()
+
+
+def get_deck_progress(conn, deck):
+    """
+    Read the progress counters for a deck.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    deck (str): Deck name
+
+    Returns:
+    dict: cards, learned (answered correctly at least once), buckets (card
+        counts for correct_count 0..MAX_BUCKET), reviews, correct_reviews and
+        streak_days (0 unless the deck was studied today or yesterday)
+    """
+    row = conn.execute('''
+        SELECT cards, reviews, correct_reviews, last_review_day, streak_days
+        FROM deck_stats WHERE deck = ?
+    ''', (deck,)).fetchone() or (0, 0, 0, None, 0)
+
+    buckets = [0] * (MAX_BUCKET + 1)
+    for bucket, cards in conn.execute(
+            'SELECT bucket, cards FROM deck_bucket_stats WHERE deck = ?', (deck,)):
+        buckets[bucket] = cards
+
+    streak = row[4]
+    if row[3] is None or date.fromisoformat(row[3]) < date.today() - timedelta(days=1):
+        streak = 0
+
+    return {
+        'cards': row[0],
+        'learned': row[0] - buckets[0],
+        'buckets': buckets,
+        'reviews': row[1],
+        'correct_reviews': row[2],
+        'streak_days': streak
+    }
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'flashcards.db'
+    repair = '--check-only' not in sys.argv
+
+    if '--check-order' in sys.argv:
+        drift = check_review_order(db_path)
+        for deck, field, stored, actual in drift:
+            print(f"{deck or '(no deck)'}: {field} is {stored} after an out-of-order replay, expected {actual}")
+        print(f"{len(drift)} mismatches after replaying reviews out of order")
+        sys.exit(1 if drift else 0)
+
+    if repair:
+        conn = sqlite3.connect(db_path)
+    else:
+        conn = connect_readonly(db_path)
+    try:
+        drift = check_deck_stats(conn, repair=repair)
+    finally:
+        conn.close()
+
+    if not drift:
+        print("Deck statistics are consistent.")
+        return
+    print(f"{'Deck':<20} {'Counter':<16} {'Stored':>10} {'Actual':>10}")
+    print("-" * 60)
+    for deck, field, stored, actual in drift:
+        print(f"{deck or '(no deck)':<20} {field:<16} {str(stored):>10} {str(actual):>10}")
+    print("\nCounters rebuilt." if repair else "\nRun without --check-only to rebuild.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import csv
+import gzip
+import json
+import sys
+
+from replica import connect_readonly
+
+
+# Rows fetched from SQLite per round trip
+DEFAULT_CHUNK_SIZE = 5000
+
+EXPORT_COLUMNS = ('id', 'deck', 'target_word', 'native_word', 'correct_count',
+                  'last_displayed', 'last_correct', 'due_date')
+
+FORMATS = ('csv', 'jsonl', 'anki')
+
+
+def iter_cards(conn, deck=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream cards with their scheduling state, fetching a chunk at a time.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    deck (str): Only export this deck (all decks if None)
+    chunk_size (int): Rows fetched per fetchmany call
+
+    Returns:
+    generator: Lists of row tuples in EXPORT_COLUMNS order, one list per chunk
+    """
+    sql = 'SELECT ' + ', '.join(EXPORT_COLUMNS) + ' FROM flashcards_with_text'
+    params = ()
+    if deck is not None:
+        sql += ' WHERE deck = ?'
+        params = (deck,)
+    sql += ' ORDER BY id'
+
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def count_cards(conn, deck=None):
+    """
+    Count the cards an export will contain, from the deck counters.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    deck (str): Only count this deck (all decks if None)
+
+    Returns:
+    int: Number of cards
+    """
+    if deck is None:
+        return conn.execute('SELECT COALESCE(SUM(cards), 0) FROM deck_stats').fetchone()[0]
+    row = conn.execute('SELECT cards FROM deck_stats WHERE deck = ?', (deck,)).fetchone()
+    return row[0] if row else 0
+
+
+def _anki_tag(deck):
+    """Anki tags cannot contain spaces."""
+    return '_'.join((deck or 'no_deck').split())
+
+
+def _write_csv(file, chunks):
+    writer = csv.writer(file)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield len(rows)
+
+
+def _write_jsonl(file, chunks):
+    for rows in chunks:
+        file.write(''.join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+                           for row in rows))
+        yield len(rows)
+
+
+def _write_anki(file, chunks):
+    # Anki's text import: front, back and tags; csv quoting handles tabs and newlines in fields
+    file.write('#separator:tab\n#html:false\n#tags column:3\n')
+    writer = csv.writer(file, delimiter='\t', lineterminator='\n')
+    for rows in chunks:
+        writer.writerows(
+            (target, native, f"{_anki_tag(deck)} correct_count::{correct_count or 0}")
+            for _, deck, target, native, correct_count, _, _, _ in rows
+        )
+        yield len(rows)
+
+
+_WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'anki': _write_anki}
+
+
+def format_for_path(path):
+    """
+    Guess the export format from a file name.
+
+    Parameters:
+    path (str): Output path, optionally ending in .gz
+
+    Returns:
+    str: 'jsonl' for .jsonl/.json, 'anki' for .txt, otherwise 'csv'
+    """
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith(('.jsonl', '.json')):
+        return 'jsonl'
+    if name.endswith('.txt'):
+        return 'anki'
+    return 'csv'
+
+
+def export_cards(conn, path, fmt=None, deck=None, compress=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 progress=None):
+    """
+    Export cards and their scheduling state to a file in constant memory.
+
+    Rows are streamed from the cursor with fetchmany and written as they
+    arrive, through gzip when compressing.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection (read-only is enough)
+    path (str): Output file path
+    fmt (str): 'csv', 'jsonl' or 'anki' (guessed from path if None)
+    deck (str): Only export this deck (all decks if None)
+    compress (bool): Gzip the output (default: when path ends in .gz)
+    chunk_size (int): Rows fetched per fetchmany call
+    progress (callable): Called as progress(exported, total) after each chunk
+
+    Returns:
+    int: Number of cards exported
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compress is None:
+        compress = path.endswith('.gz')
+
+    total = count_cards(conn, deck) if progress else None
+    if compress:
+        file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+    else:
+        file = open(path, 'w', encoding='utf-8', newline='')
+
+    exported = 0
+    with file:
+        for written in _WRITERS[fmt](file, iter_cards(conn, deck, chunk_size)):
+            exported += written
+            if progress:
+                progress(exported, total)
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export flashcards with their scheduling state.")
+    parser.add_argument('output', help="Output file; .gz compresses, .jsonl/.txt pick the format")
+    parser.add_argument('--db', default='flashcards.db', help="Database path (default: flashcards.db)")
+    parser.add_argument('--deck', help="Only export this deck")
+    parser.add_argument('--format', choices=FORMATS, help="Output format (default: from the file name)")
+    parser.add_argument('--gzip', action='store_true', help="Compress even without a .gz suffix")
+    args = parser.parse_args()
+
+    def report(exported, total):
+        percent = f" ({exported * 100 // total}%)" if total else ""
+        print(f"\rExported {exported} of {total} cards{percent}", end='', file=sys.stderr, flush=True)
+
+    conn = connect_readonly(args.db)
+    try:
+        exported = export_cards(conn, args.output, fmt=args.format, deck=args.deck,
+                                compress=args.gzip or None, progress=report)
+    finally:
+        conn.close()
+    print(f"\nExported {exported} cards to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
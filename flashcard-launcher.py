@@ -1,60 +1,161 @@
 import os
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
+import sqlite3
 from flashcard_app import FlashcardApp  # Import your refactored FlashcardApp class
+from deck_stats import MAX_BUCKET, get_deck_progress
+from load_db import create_flashcards_db, deck_name_for_file, forecast_workload
+from maintenance import maintenance_due, run_maintenance
+from profiling import EventLoopProfiler, profiling_requested
+from replica import connect_readonly
+from set_store import add_set, initialize_sets, load_sets, update_set
+from session_host import SessionHost
+from watcher import DeckWatcher
 
 class FlashcardLauncher:
     """A launcher application for selecting and starting different flashcard sets."""
     
-    def __init__(self):
+    FORECAST_DAYS = 30  # Days shown in the workload histogram
+    MAINTENANCE_AT_STARTUP = True  # Check and compact the database in the background at startup
+    MAINTENANCE_INTERVAL_DAYS = 7  # Days between background maintenance runs
+    MAINTENANCE_BUDGET = 5  # Seconds a background maintenance run may take
+    MAINTENANCE_POLL_INTERVAL = 500  # How often the launcher checks for the result (ms)
+    WATCH_DATA_DIR = True  # Import new and edited CSV files from data/ in the background
+    DATA_DIR = "data"
+    IMPORT_POLL_INTERVAL = 250  # How often the import progress indicator is updated (ms)
+    IMPORT_MESSAGE_TIME = 3000  # How long a finished import's result stays visible (ms)
+    
+    def __init__(self, profile=False):
+        # Optional event loop profiling (also enabled by FLASHCARD_PROFILE=1),
+        # started before the UI is built so every widget command is timed
+        self.profiler = None
+        if profile or profiling_requested():
+            self.profiler = EventLoopProfiler("flashcard_launcher")
+            self.profiler.start()
+        
         # Set up the main window
         self.window = tk.Tk()
         self.window.title("Flashcard Launcher")
-        self.window.geometry("500x400")
+        self.window.geometry("500x610")
         self.window.config(padx=20, pady=20)
         
-        # Define the configuration file path
+        # Define the database path and the old configuration file imported on first run
         self.config_file = "flashcard_sets.json"
+        self.db_path = "flashcards.db"
+        
+        # Make sure the database exists and is on the current schema
+        create_flashcards_db(self.db_path).close()
+        
+        # Shared host for multi-session mode, created on first use
+        self.session_host = None
+        self.multi_session = tk.BooleanVar(value=False)
         
         # Load available flashcard sets
         self.flashcard_sets = self.load_flashcard_sets()
         
         # Set up the UI
         self.setup_ui()
+        
+        # Periodic integrity check and compaction, off the UI thread
+        self.maintenance_thread = None
+        self.maintenance_report = None
+        if self.MAINTENANCE_AT_STARTUP:
+            self.start_background_maintenance()
+        
+        # Keep the database in step with the deck files, off the UI thread
+        self.deck_watcher = None
+        self.imports_completed = 0
+        if self.WATCH_DATA_DIR:
+            self.start_deck_watcher()
+    
+    def start_background_maintenance(self):
+        """Run database maintenance in a background thread if it is due."""
+        def run():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                if maintenance_due(conn, self.MAINTENANCE_INTERVAL_DAYS):
+                    print("Running background database maintenance...")
+                    self.maintenance_report = run_maintenance(conn, budget=self.MAINTENANCE_BUDGET)
+            except sqlite3.Error as e:
+                print(f"Background maintenance failed: {e}")
+            finally:
+                conn.close()
+        
+        self.maintenance_thread = threading.Thread(target=run, name="maintenance", daemon=True)
+        self.maintenance_thread.start()
+        self.window.after(self.MAINTENANCE_POLL_INTERVAL, self._check_maintenance)
+    
+    def _check_maintenance(self):
+        """Warn about integrity problems once the background maintenance has finished."""
+        if self.maintenance_thread.is_alive():
+            self.window.after(self.MAINTENANCE_POLL_INTERVAL, self._check_maintenance)
+            return
+        report = self.maintenance_report
+        if report and report["problems"]:
+            messagebox.showwarning(
+                "Database Problems",
+                f"The integrity check found {len(report['problems'])} problem(s) in {self.db_path}. "
+                "Run maintenance.py for details and keep a backup of the file."
+            )
+    
+    def start_deck_watcher(self):
+        """Watch the data directory and import changed deck files in the background."""
+        self.deck_watcher = DeckWatcher(self.DATA_DIR, self.db_path)
+        self.deck_watcher.start()
+        self.window.after(self.IMPORT_POLL_INTERVAL, self._check_imports)
+    
+    def _check_imports(self):
+        """Show the progress of background imports and refresh statistics when one finishes."""
+        if self.deck_watcher is None:
+            return
+        delay = self.IMPORT_POLL_INTERVAL
+        progress = self.deck_watcher.progress()
+        if progress["file"] is not None:
+            self.import_label.config(
+                text=f"Importing {progress['file']} ({progress['done'] + 1} of {progress['total']})..."
+            )
+            self.import_progress.config(maximum=progress["total"], value=progress["done"])
+            self.import_frame.grid()
+        elif progress["completed"] != self.imports_completed:
+            self.imports_completed = progress["completed"]
+            message = f"Imported {progress['imported']} new card(s) from data files"
+            if progress["failed"]:
+                message += f"; {progress['failed']} file(s) could not be imported"
+            self.import_label.config(text=message)
+            self.import_progress.config(maximum=progress["total"], value=progress["done"])
+            self.import_frame.grid()
+            self.update_stats()
+            delay = self.IMPORT_MESSAGE_TIME  # Leave the result up for a moment
+        else:
+            self.import_frame.grid_remove()
+        self.window.after(delay, self._check_imports)
+    
+    def _sets_connection(self):
+        """Open a connection for reading and writing the set configuration."""
+        return sqlite3.connect(self.db_path, timeout=10)
     
     def load_flashcard_sets(self):
-        """Load the available flashcard sets from the configuration file."""
+        """Load the flashcard sets, importing the old JSON configuration on first run."""
+        conn = self._sets_connection()
         try:
-            with open(self.config_file, "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            # If the file doesn't exist, create a default configuration
-            default_sets = [
-                {
-                    "name": "Italian Vocabulary",
-                    "data_file": "data/Italian_500 .csv",
-                    "front_lang": "Italian",
-                    "back_lang": "English"
-                },
-                {
-                    "name": "Example Set (Add your own)",
-                    "data_file": "data/your_file.csv",
-                    "front_lang": "Front",
-                    "back_lang": "Back"
-                }
-            ]
-            
-            # Save the default configuration
-            with open(self.config_file, "w") as file:
-                json.dump(default_sets, file, indent=4)
-            
-            return default_sets
+            initialize_sets(conn, self.config_file)
+            return load_sets(conn)
+        finally:
+            conn.close()
     
-    def save_flashcard_sets(self):
-        """Save the current flashcard sets to the configuration file."""
-        with open(self.config_file, "w") as file:
-            json.dump(self.flashcard_sets, file, indent=4)
+    def save_flashcard_set(self, set_data):
+        """Save one added or edited set; returns the set with its id."""
+        conn = self._sets_connection()
+        try:
+            if "id" in set_data:
+                update_set(conn, set_data["id"], set_data)
+            else:
+                set_data = {**set_data, "id": add_set(conn, set_data)}
+        finally:
+            conn.close()
+        return set_data
     
     def setup_ui(self):
         """Set up the user interface."""
@@ -140,6 +241,14 @@ class FlashcardLauncher:
         )
         edit_button.grid(row=0, column=2, padx=5)
         
+        # Multi-session toggle
+        multi_check = tk.Checkbutton(
+            button_frame,
+            text="Open sets in separate windows (study several at once)",
+            variable=self.multi_session
+        )
+        multi_check.grid(row=1, column=0, columnspan=3, pady=(10, 0), sticky="w")
+        
         # Statistics label
         self.stats_label = tk.Label(
             self.window,
@@ -149,6 +258,24 @@ class FlashcardLauncher:
         )
         self.stats_label.grid(row=4, column=0, columnspan=2, pady=(10, 0), sticky="w")
         
+        # Review workload histogram
+        self.forecast_canvas = tk.Canvas(
+            self.window,
+            width=460,
+            height=90,
+            highlightthickness=0
+        )
+        self.forecast_canvas.grid(row=5, column=0, columnspan=2, pady=(10, 0), sticky="w")
+        
+        # Background import progress, shown only while the deck watcher is importing
+        self.import_frame = tk.Frame(self.window)
+        self.import_frame.grid(row=6, column=0, columnspan=2, pady=(10, 0), sticky="ew")
+        self.import_label = tk.Label(self.import_frame, text="", font=("Arial", 9), anchor="w")
+        self.import_label.pack(fill=tk.X)
+        self.import_progress = ttk.Progressbar(self.import_frame, mode="determinate")
+        self.import_progress.pack(fill=tk.X)
+        self.import_frame.grid_remove()
+        
         # Update statistics for the selected set
         self.set_listbox.bind('<<ListboxSelect>>', self.update_stats)
     
@@ -172,16 +299,25 @@ class FlashcardLauncher:
             )
             return
         
+        session_options = {
+            "deck": deck_name_for_file(selected_set["data_file"]),
+            "front_lang": selected_set["front_lang"],
+            "back_lang": selected_set["back_lang"],
+            "load_balance": selected_set.get("load_balance", False),
+            "directions": tuple(selected_set.get("directions", ["forward"])),
+            "learning_steps": selected_set.get("learning_steps")
+        }
+        
+        if self.multi_session.get():
+            self.start_hosted_session(session_options)
+            return
+        
         # Close the launcher window
         self.window.withdraw()
         
         # Start the flashcard app
         try:
-            app = FlashcardApp(
-                data_file=selected_set["data_file"],
-                front_lang=selected_set["front_lang"],
-                back_lang=selected_set["back_lang"]
-            )
+            app = FlashcardApp(db_path=self.db_path, **session_options)
             
             # When the FlashcardApp closes, show the launcher again
             self.window.protocol("WM_DELETE_WINDOW", lambda: None)  # Disable the X button
@@ -192,11 +328,37 @@ class FlashcardLauncher:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
             self.window.deiconify()  # Show the launcher again
     
+    def start_hosted_session(self, session_options):
+        """Open a study session as another window of the launcher's process."""
+        if self.session_host is None:
+            self.session_host = SessionHost(self.window, self.db_path)
+        
+        try:
+            app = self.session_host.open_session(**session_options)
+            app.window.protocol("WM_DELETE_WINDOW", lambda: self.on_hosted_session_close(app))
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+    
+    def on_hosted_session_close(self, app):
+        """Handle a hosted study session window closing."""
+        self.session_host.close_session(app)
+        self.update_stats()  # Update statistics after studying
+    
+    def on_launcher_close(self):
+        """Close any hosted sessions, then the launcher."""
+        if self.deck_watcher is not None:
+            self.deck_watcher.stop()
+            self.deck_watcher = None
+        if self.session_host is not None:
+            self.session_host.close()
+            self.session_host = None
+        self.window.destroy()
+    
     def on_flashcard_close(self, app):
         """Handle the flashcard app closing."""
-        app.window.destroy()
+        app.close()  # Save buffered answers and stop its timers before reading stats
         self.window.deiconify()  # Show the launcher again
-        self.window.protocol("WM_DELETE_WINDOW", self.window.destroy)  # Re-enable the X button
+        self.window.protocol("WM_DELETE_WINDOW", self.on_launcher_close)  # Re-enable the X button
         self.update_stats()  # Update statistics after studying
     
     def update_stats(self, event=None):
@@ -205,48 +367,82 @@ class FlashcardLauncher:
         
         if not selected_indices:
             self.stats_label.config(text="")
+            self.forecast_canvas.delete("all")
             return
         
         selected_index = selected_indices[0]
         selected_set = self.flashcard_sets[selected_index]
         
-        # Check if the data file exists
-        if not os.path.exists(selected_set["data_file"]):
-            self.stats_label.config(text="Warning: Data file not found.")
-            return
-        
-        # Get the known words file path
-        data_dir = os.path.dirname(os.path.abspath(selected_set["data_file"]))
-        base_name = os.path.splitext(os.path.basename(selected_set["data_file"]))[0]
-        known_file = os.path.join(data_dir, f"{base_name}_known_words.json")
+        deck = deck_name_for_file(selected_set["data_file"])
         
-        # Count total words in the dataset
+        # Read the trigger-maintained counters for the deck
         try:
-            import pandas as pd
-            df = pd.read_csv(selected_set["data_file"])
-            total_words = len(df)
+            conn = self._stats_connection()
+            try:
+                progress = get_deck_progress(conn, deck)
+            finally:
+                conn.close()
             
-            # Count known words
-            known_words = 0
-            if os.path.exists(known_file):
-                with open(known_file, "r") as file:
-                    known_list = json.load(file)
-                    known_words = len(known_list)
+            total_words = progress["cards"]
+            known_words = progress["learned"]
             
             # Calculate progress percentage
-            progress = (known_words / total_words) * 100 if total_words > 0 else 0
+            percent = (known_words / total_words) * 100 if total_words > 0 else 0
+            mastery = " / ".join(str(count) for count in progress["buckets"])
             
             # Update the statistics label
             stats_text = (
                 f"Statistics for {selected_set['name']}:\n"
                 f"Total words: {total_words}\n"
                 f"Words learned: {known_words}\n"
-                f"Progress: {progress:.1f}%"
+                f"Progress: {percent:.1f}%\n"
+                f"Cards by correct answers (0-{MAX_BUCKET}+): {mastery}\n"
+                f"Study streak: {progress['streak_days']} day(s)"
             )
+            if not os.path.exists(selected_set["data_file"]):
+                stats_text += "\nWarning: Data file not found."
             self.stats_label.config(text=stats_text)
             
         except Exception as e:
             self.stats_label.config(text=f"Error loading statistics: {str(e)}")
+        
+        self.draw_forecast(deck)
+    
+    def _stats_connection(self):
+        """Open a read-only connection for reading statistics."""
+        return connect_readonly(self.db_path)
+    
+    def draw_forecast(self, deck):
+        """Draw a histogram of the reviews due per day for a deck."""
+        canvas = self.forecast_canvas
+        canvas.delete("all")
+        
+        try:
+            conn = self._stats_connection()
+            try:
+                counts = forecast_workload(conn, days=self.FORECAST_DAYS, deck=deck)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            canvas.create_text(0, 10, anchor="w", text=f"Forecast unavailable: {e}")
+            return
+        
+        peak = max(counts)
+        canvas.create_text(
+            0, 8, anchor="w", font=("Arial", 9),
+            text=f"Reviews due, next {len(counts)} days (total {sum(counts)}, peak {peak}/day):"
+        )
+        
+        # Scale bars to the busiest day
+        top, bottom = 20, 85
+        bar_width = int(canvas["width"]) // len(counts)
+        for day, count in enumerate(counts):
+            if not count:
+                continue
+            height = (bottom - top) * count / peak
+            x = day * bar_width
+            canvas.create_rectangle(x + 1, bottom - height, x + bar_width - 1, bottom,
+                                    fill="#4a90c2", outline="")
     
     def add_new_set(self):
         """Open a dialog to add a new flashcard set."""
@@ -268,7 +464,7 @@ class FlashcardLauncher:
         # Create a new dialog window
         dialog = tk.Toplevel(self.window)
         dialog.title("Add Flashcard Set" if edit_index is None else "Edit Flashcard Set")
-        dialog.geometry("400x250")
+        dialog.geometry("400x280")
         dialog.config(padx=20, pady=20)
         dialog.transient(self.window)  # Make the dialog modal
         dialog.grab_set()
@@ -281,11 +477,13 @@ class FlashcardLauncher:
             default_file = set_data["data_file"]
             default_front = set_data["front_lang"]
             default_back = set_data["back_lang"]
+            default_reverse = "reverse" in set_data.get("directions", [])
         else:
             default_name = ""
             default_file = "data/"
             default_front = ""
             default_back = ""
+            default_reverse = False
         
         # Create form fields
         tk.Label(dialog, text="Set Name:").grid(row=0, column=0, sticky="w", pady=5)
@@ -322,6 +520,10 @@ class FlashcardLauncher:
         back_entry.grid(row=3, column=1, sticky="ew", pady=5)
         back_entry.insert(0, default_back)
         
+        reverse_var = tk.BooleanVar(value=default_reverse)
+        reverse_check = tk.Checkbutton(dialog, text="Also review back-to-front", variable=reverse_var)
+        reverse_check.grid(row=4, column=1, sticky="w", pady=5)
+        
         # Save function
         def save_set():
             name = name_entry.get().strip()
@@ -339,10 +541,19 @@ class FlashcardLauncher:
                 "name": name,
                 "data_file": file_path,
                 "front_lang": front_lang,
-                "back_lang": back_lang
+                "back_lang": back_lang,
+                "directions": ["forward", "reverse"] if reverse_var.get() else ["forward"]
             }
             
-            # Update or add the set
+            # Update or add the set, keeping options the dialog does not show
+            if edit_index is not None:
+                set_data = {**self.flashcard_sets[edit_index], **set_data}
+            try:
+                set_data = self.save_flashcard_set(set_data)
+            except sqlite3.Error as e:
+                messagebox.showerror("Error", f"Could not save the set: {e}")
+                return
+            
             if edit_index is not None:
                 self.flashcard_sets[edit_index] = set_data
                 self.set_listbox.delete(edit_index)
@@ -353,9 +564,6 @@ class FlashcardLauncher:
                 self.set_listbox.insert(tk.END, name)
                 self.set_listbox.selection_set(tk.END)
             
-            # Save the configuration
-            self.save_flashcard_sets()
-            
             # Close the dialog
             dialog.destroy()
             
@@ -364,7 +572,7 @@ class FlashcardLauncher:
         
         # Buttons
         button_frame = tk.Frame(dialog)
-        button_frame.grid(row=4, column=0, columnspan=3, pady=(20, 0))
+        button_frame.grid(row=5, column=0, columnspan=3, pady=(20, 0))
         
         save_button = tk.Button(button_frame, text="Save", width=10, command=save_set)
         save_button.grid(row=0, column=0, padx=5)
@@ -374,9 +582,14 @@ class FlashcardLauncher:
     
     def run(self):
         """Run the launcher application."""
-        self.window.mainloop()
+        self.window.protocol("WM_DELETE_WINDOW", self.on_launcher_close)
+        try:
+            self.window.mainloop()
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
 
 
 if __name__ == "__main__":
-    launcher = FlashcardLauncher()
+    launcher = FlashcardLauncher(profile="--profile" in sys.argv)
     launcher.run()
@@ -1,7 +1,15 @@
-from tkinter import Tk, Canvas, PhotoImage, Button
-import pandas as pd
+from tkinter import Tk, Toplevel, Canvas, Button
+from contextlib import contextmanager
 import random
 import sqlite3
+import time
+from latency import LatencyStats, save_reviews
+from learning_queue import LearningQueue
+from load_db import load_balanced_interval, save_review_states
+from media import MediaCache, get_card_media
+from profiling import EventLoopProfiler, profiling_requested
+from session_cache import SessionCardCache
+from session_host import ImageCache
 
 
 class FlashcardApp:
@@ -11,8 +19,13 @@ class FlashcardApp:
     BACKGROUND_COLOR = "#B1DDC6"
     FLIP_DELAY = 5000  # Time before card flips (ms)
     NEXT_CARD_DELAY = 3000  # Time before next card appears after flip (ms)
+    MIN_FLIP_DELAY = 1500  # Shortest adaptive flip delay for well-known cards (ms)
+    REVIEW_FLUSH_INTERVAL = 30000  # How often buffered answers and reviews are saved (ms)
+    PREFETCH_CARDS = 3  # Upcoming cards whose images are read ahead in the background
     
-    def __init__(self, db_path='flashcards.db', front_lang="Target", back_lang="Native", days_multiplier=7):
+    def __init__(self, db_path='flashcards.db', front_lang="Target", back_lang="Native", days_multiplier=7,
+                 load_balance=False, deck=None, host=None, directions=('forward',), learning_steps=None,
+                 profile=False):
         """Initialize the flashcard application.
         
         Args:
@@ -20,11 +33,85 @@ class FlashcardApp:
             front_lang (str): Label for the front of the cards
             back_lang (str): Label for the back of the cards
             days_multiplier (int): Number of days to multiply by correct_count for spacing
+            load_balance (bool): Shift new due dates to quieter days to smooth the review load
+            deck (str): Only study cards from this deck (all decks if None)
+            host (SessionHost): Run as a Toplevel window sharing the host's
+                connections, images and writer instead of as a standalone app
+            directions (tuple): Review directions; 'reverse' shows the back of
+                the card first
+            learning_steps (tuple): Seconds until a failed card is shown again,
+                one entry per step (defaults to 1 and 10 minutes)
+            profile (bool): Time every Tk callback and write a profile when
+                run() exits (also enabled by FLASHCARD_PROFILE=1). Hosted
+                sessions are covered by the host's profiler instead.
         """
+        self.db_path = db_path
+        self.host = host
+        self.conn = None
+        
+        # Started before the UI is built so every widget command is timed
+        self.profiler = None
+        if host is None and (profile or profiling_requested()):
+            self.profiler = EventLoopProfiler("flashcard_app")
+            self.profiler.start()
+        
+        if host is None:
+            self._connect(db_path)
+        
+        self.days_multiplier = days_multiplier
+        self.load_balance = load_balance
+        self.deck = deck
+        self.directions = tuple(directions)
+        self.current_cards = []
+        self.current_card = None
+        self.front_lang = front_lang
+        self.back_lang = back_lang
+        self.flip_timer = None
+        self.next_card_timer = None
+        
+        # Media references of cards seen so far (card_id -> {kind: path})
+        self.card_media = {}
+        
+        # Working set of cards; answers are written to the database in batches
+        self.card_cache = SessionCardCache()
+        
+        # Failed cards waiting to be shown again within the session
+        self.learning = LearningQueue(learning_steps)
+        
+        # Answer timing, measured with a monotonic clock
+        self.latency = LatencyStats()
+        self.shown_at = None
+        self.session_started = time.monotonic()
+        self.cards_answered = 0
+        try:
+            with self._connection() as conn:
+                self.latency.load_history(conn, self.deck)
+        except sqlite3.Error as e:
+            print(f"Could not load answer history: {e}")
+        
+        # Set up the UI
+        self._setup_ui()
+        self.flush_timer = self.window.after(self.REVIEW_FLUSH_INTERVAL, self._periodic_flush)
+        
+        # Load cards and display the first one
+        self._load_cards()
+        self.next_card()
+    
+    def _connect(self, db_path):
+        """Open the session's own database connection."""
         try:
             self.conn = sqlite3.connect(db_path)
             print(f"Connecting to database: {db_path}")
             
+            # Statistics are read on separate read-only connections; WAL keeps them from blocking answers.
+            # synchronous=NORMAL drops the fsync from each answer commit (see create_flashcards_db)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            
+            # Bring older databases up to the current schema
+            from migrations import migrate
+            migrate(self.conn)
+            
             # Test the connection
             cursor = self.conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM flashcards')
@@ -38,46 +125,49 @@ class FlashcardApp:
         except Exception as e:
             print(f"Fatal error: {e}")
             raise SystemExit(1)
-        
-        self.days_multiplier = days_multiplier
-        self.current_cards = []
-        self.current_card = None
-        self.front_lang = front_lang
-        self.back_lang = back_lang
-        self.flip_timer = None
-        self.next_card_timer = None
-        
-        # Set up the UI
-        self._setup_ui()
-        
-        # Load cards and display the first one
-        self._load_cards()
-        self.next_card()
+    
+    @contextmanager
+    def _connection(self):
+        """Provide a connection for reading, borrowed from the host's pool when shared."""
+        if self.host is not None:
+            with self.host.pool.connection() as conn:
+                yield conn
+        else:
+            yield self.conn
     
     def _setup_ui(self):
         """Set up the user interface."""
-        # Initialize the main window
-        self.window = Tk()
-        self.window.title("Flashy")
+        # Initialize the main window, sharing the host's images when hosted
+        if self.host is not None:
+            self.window = Toplevel(self.host.root)
+            self.images = self.host.images
+            self.media = self.host.media
+        else:
+            self.window = Tk()
+            self.images = ImageCache(self.window)
+            self.media = MediaCache(self.window)
+        self.window.title(f"Flashy - {self.deck}" if self.deck else "Flashy")
         self.window.config(padx=50, pady=50, bg=self.BACKGROUND_COLOR)
         
         # Create the canvas for displaying cards
-        self.canvas = Canvas(width=800, height=526)
+        self.canvas = Canvas(self.window, width=800, height=526)
         self.canvas.config(bg=self.BACKGROUND_COLOR, highlightthickness=0)
         self.canvas.grid(row=0, column=0, columnspan=2)
         
         # Load card images
-        self.card_front_img = PhotoImage(file="images/card_front.png")
-        self.card_back_img = PhotoImage(file="images/card_back.png")
+        self.card_front_img = self.images.get("card_front.png")
+        self.card_back_img = self.images.get("card_back.png")
         
         # Create card elements
         self.card_background = self.canvas.create_image(400, 263, image=self.card_front_img)
         self.card_title = self.canvas.create_text(400, 150, text="", font=("Arial", 40, "italic"))
         self.card_word = self.canvas.create_text(400, 263, text="", font=("Arial", 60, "bold"))
+        self.card_image = self.canvas.create_image(400, 410, image="")
         
         # Create buttons
-        cross_image = PhotoImage(file="images/wrong.png")
+        cross_image = self.images.get("wrong.png")
         unknown_button = Button(
+            self.window,
             image=cross_image, 
             highlightthickness=0, 
             command=self.mark_unknown,
@@ -85,8 +175,9 @@ class FlashcardApp:
         )
         unknown_button.grid(row=1, column=0)
         
-        check_image = PhotoImage(file="images/right.png")
+        check_image = self.images.get("right.png")
         known_button = Button(
+            self.window,
             image=check_image, 
             highlightthickness=0, 
             command=self.mark_known,
@@ -102,7 +193,17 @@ class FlashcardApp:
         """Load cards that are due for review."""
         try:
             from load_db import get_cards_for_review
-            self.current_cards = get_cards_for_review(self.conn, self.days_multiplier)
+            self.flush_answers()
+            if self.host is not None:
+                # Make sure answers still queued on the writer are counted,
+                # and failed ones are back in the cache before reloading
+                self.host.writer.wait()
+                self.host.report_errors()
+            with self._connection() as conn:
+                cards = get_cards_for_review(conn, self.days_multiplier, deck=self.deck, directions=self.directions)
+            # Failed cards are already waiting in the learning queue
+            self.current_cards = self.card_cache.add_all(
+                [card for card in cards if (card['id'], card['direction']) not in self.learning])
             print(f"Loaded {len(self.current_cards)} cards for review")
             for card in self.current_cards[:3]:
                 print(f"Card: {card}")
@@ -114,23 +215,49 @@ class FlashcardApp:
         random.shuffle(self.current_cards)
     
     def next_card(self):
-        """Display the next flashcard."""
-        if not self.current_cards:
-            self._load_cards()
+        """Display the next flashcard.
+        
+        Learning cards whose step has elapsed come first, then due cards.
+        If only learning cards remain, wait until the next one is due.
+        """
+        self._cancel_timers()
+        if self.current_card is not None and self.shown_at is not None:
+            # Skipped without an answer; keep learning cards in the session
+            self.learning.repeat(self.current_card)
+        
+        card = self.learning.pop_due()
+        if card is None:
             if not self.current_cards:
+                self._load_cards()
+            if self.current_cards:
+                card = self.current_cards.pop()
+        
+        if card is None:
+            self.current_card = None
+            self.shown_at = None
+            wait = self.learning.seconds_until_due()
+            if wait is None:
                 self.show_completion_message()
-                return
-
-        self._cancel_timers()
-        self.current_card = self.current_cards.pop()
+            else:
+                self.show_waiting_message(wait)
+                self.next_card_timer = self.window.after(int(wait * 1000) + 1, self.next_card)
+            return
+        
+        self.current_card = card
         
         # Update display
         self.canvas.itemconfig(self.card_background, image=self.card_front_img)
-        self.canvas.itemconfig(self.card_title, text=self.front_lang, fill="black")
-        self.canvas.itemconfig(self.card_word, text=self.current_card['target_word'], fill="black")
+        front_lang, front_word, _, _ = self._card_sides()
+        self.canvas.itemconfig(self.card_title, text=front_lang, fill="black")
+        self.canvas.itemconfig(self.card_word, text=front_word, fill="black")
+        self._prefetch_media()
+        self._show_media()
+        self.shown_at = time.monotonic()
         
-        # Set flip timer
-        self.flip_timer = self.window.after(self.FLIP_DELAY, self.flip_card)
+        # Set flip timer, shorter for cards that are usually answered quickly
+        flip_delay = self.latency.flip_delay(self.current_card['id'], self.FLIP_DELAY, self.MIN_FLIP_DELAY,
+                                             direction=self._direction())
+        self.flip_timer = self.window.after(flip_delay, self.flip_card)
     
     def flip_card(self):
         """Flip the card to show the translation."""
@@ -144,14 +271,53 @@ class FlashcardApp:
             
         # Update the UI to show the back of the card
         self.canvas.itemconfig(self.card_background, image=self.card_back_img)
-        self.canvas.itemconfig(self.card_title, text=self.back_lang, fill="white")
-        self.canvas.itemconfig(self.card_word, text=self.current_card['native_word'], fill="white")
+        _, _, back_lang, back_word = self._card_sides()
+        self.canvas.itemconfig(self.card_title, text=back_lang, fill="white")
+        self.canvas.itemconfig(self.card_word, text=back_word, fill="white")
         
         # Set a timer to show the next card automatically
         self.next_card_timer = self.window.after(self.NEXT_CARD_DELAY, self.next_card)
     
+    def _prefetch_media(self):
+        """Look up media for the current and next few cards and start reading their images."""
+        upcoming = [self.current_card] + self.current_cards[-self.PREFETCH_CARDS:]
+        unknown = {card['id'] for card in upcoming if card['id'] not in self.card_media}
+        if unknown:
+            try:
+                with self._connection() as conn:
+                    found = get_card_media(conn, unknown)
+            except sqlite3.Error as e:
+                print(f"Could not load card media: {e}")
+                found = {}
+            for card_id in unknown:
+                self.card_media[card_id] = found.get(card_id, {})
+        self.media.prefetch(self.card_media[card['id']].get('image') for card in upcoming[1:])
+    
+    def _show_media(self):
+        """Show the current card's image, if it has one."""
+        path = self.card_media.get(self.current_card['id'], {}).get('image')
+        image = self.media.get(path) if path else None
+        self.canvas.itemconfig(self.card_image, image=image or "")
+    
+    def _direction(self):
+        """Direction the current card is being reviewed in."""
+        return self.current_card.get('direction', 'forward')
+    
+    def _card_sides(self):
+        """Labels and words for the front and back of the current card.
+        
+        Returns:
+            tuple: (front_lang, front_word, back_lang, back_word)
+        """
+        card = self.current_card
+        if self._direction() == 'reverse':
+            return self.back_lang, card['native_word'], self.front_lang, card['target_word']
+        return self.front_lang, card['target_word'], self.back_lang, card['native_word']
+    
     def _check_connection(self):
         """Verify database connection is still valid."""
+        if self.host is not None:
+            return True
         try:
             self.conn.execute("SELECT 1")
             return True
@@ -175,20 +341,10 @@ class FlashcardApp:
         print(f"\nMarking card as known: {self.current_card}")  # Debug
         
         try:
-            # Verify card exists in database before update
-            cursor = self.conn.cursor()
-            cursor.execute('SELECT * FROM flashcards WHERE id = ?', (self.current_card['id'],))
-            before = cursor.fetchone()
-            print(f"Card before update: {before}")  # Debug
-
-            from load_db import update_card_status
-            update_card_status(self.conn, self.current_card['id'], correct=True)
-            
-            # Verify update
-            cursor.execute('SELECT * FROM flashcards WHERE id = ?', (self.current_card['id'],))
-            after = cursor.fetchone()
-            print(f"Card after update: {after}")  # Debug
-            
+            self._record_latency(correct=True)
+            # Intermediate learning steps only move the card along in the session
+            if not self.learning.advance(self.current_card):
+                self._record_answer(correct=True)
         except sqlite3.Error as e:
             print(f"Database error in mark_known: {e}")
             self.show_error_message("Update Error", str(e))
@@ -208,8 +364,9 @@ class FlashcardApp:
             return
 
         try:
-            from load_db import update_card_status
-            update_card_status(self.conn, self.current_card['id'], correct=False)
+            self._record_latency(correct=False)
+            self._record_answer(correct=False)
+            self.learning.fail(self.current_card)
         except sqlite3.Error as e:
             print(f"Error updating card status: {e}")
             self.show_error_message("Update Error", 
@@ -221,10 +378,98 @@ class FlashcardApp:
         finally:
             self.next_card()
     
+    def _record_answer(self, correct):
+        """Apply the answer to the cached card and queue it for the database."""
+        card = self.current_card
+        if correct and self.load_balance:
+            with self._connection() as conn:
+                updated = self.card_cache.record_answer(
+                    card, correct, self.days_multiplier,
+                    interval_picker=lambda interval: load_balanced_interval(conn, card.get('deck'), interval))
+        else:
+            updated = self.card_cache.record_answer(card, correct, self.days_multiplier)
+        self.current_card = updated
+        
+        if self.card_cache.should_flush():
+            self.flush_answers()
+    
+    def flush_answers(self):
+        """Write queued answers to the database, via the host's writer when shared."""
+        states = self.card_cache.drain()
+        if not states:
+            return
+        if self.host is not None:
+            # Failed batches are queued again and retried with the next flush
+            self.host.writer.submit(save_review_states, states,
+                                    on_error=lambda: self.card_cache.requeue(states))
+            return
+        try:
+            save_review_states(self.conn, states)
+        except sqlite3.Error as e:
+            print(f"Error saving answers: {e}")
+            self.card_cache.requeue(states)
+            self.show_error_message("Update Error", "Could not save your answers.")
+    
+    def _record_latency(self, correct):
+        """Record how long the current card was shown before it was answered."""
+        if self.shown_at is None:
+            return
+        latency_ms = int((time.monotonic() - self.shown_at) * 1000)
+        self.shown_at = None
+        self.cards_answered += 1
+        self.latency.record(self.current_card['id'], self.current_card.get('deck'), latency_ms, correct,
+                            direction=self._direction())
+    
+    def _periodic_flush(self):
+        """Save queued answers and review timings, then schedule the next flush."""
+        self.flush_answers()
+        self.flush_reviews()
+        self.flush_timer = self.window.after(self.REVIEW_FLUSH_INTERVAL, self._periodic_flush)
+    
+    def flush_reviews(self):
+        """Save buffered review timings, via the host's writer when shared."""
+        reviews = self.latency.drain()
+        if not reviews:
+            return
+        if self.host is not None:
+            self.host.writer.submit(save_reviews, reviews, on_error=lambda: self.latency.requeue(reviews))
+            return
+        try:
+            save_reviews(self.conn, reviews)
+        except sqlite3.Error as e:
+            print(f"Error saving review timings: {e}")
+            self.latency.requeue(reviews)
+    
+    def session_summary(self):
+        """Summarize the session's throughput.
+        
+        Returns:
+            str: Cards answered, minutes studied, cards per minute and the
+                deck's median correct-answer time
+        """
+        minutes = (time.monotonic() - self.session_started) / 60
+        rate = self.cards_answered / minutes if minutes > 0 else 0
+        summary = f"{self.cards_answered} cards in {minutes:.1f} min ({rate:.1f} cards/min)"
+        typical = self.latency.deck_median(self.deck) if self.deck else None
+        if typical is not None:
+            summary += f", typical answer {typical / 1000:.1f}s"
+        return summary
+    
+    def show_waiting_message(self, seconds):
+        """Show how long until the next failed card comes back."""
+        self.canvas.itemconfig(self.card_background, image=self.card_front_img)
+        self.canvas.itemconfig(self.card_image, image="")
+        self.canvas.itemconfig(self.card_title, text="Well done!", fill="black")
+        self.canvas.itemconfig(self.card_word, text=f"Next card in\n{int(seconds) + 1} seconds", fill="black")
+    
     def show_completion_message(self):
         """Show a message when all cards are completed."""
         self.canvas.itemconfig(self.card_title, text="Great job!", fill="black")
         self.canvas.itemconfig(self.card_word, text="No more cards to review\nfor now!", fill="black")
+        self.canvas.itemconfig(self.card_background, image=self.card_front_img)
+        self.canvas.itemconfig(self.card_image, image="")
+        self.canvas.delete("summary")
+        self.canvas.create_text(400, 400, text=self.session_summary(), font=("Arial", 20), tags="summary")
     
     def _cancel_timers(self):
         """Cancel any active timers to prevent memory leaks."""
@@ -241,17 +486,36 @@ class FlashcardApp:
         from tkinter import messagebox
         messagebox.showerror(title, message)
     
+    def close(self):
+        """Close the session window."""
+        self._cancel_timers()
+        if self.flush_timer:
+            self.window.after_cancel(self.flush_timer)
+            self.flush_timer = None
+        self.flush_answers()
+        self.flush_reviews()
+        print(f"Session summary: {self.session_summary()}")
+        if self.host is None:
+            self.media.close()
+        self.window.destroy()
+    
     def __del__(self):
         """Destructor to ensure database connection is closed."""
         try:
-            if hasattr(self, 'conn'):
+            if getattr(self, 'conn', None) is not None:
                 self.conn.close()
                 print("Database connection closed.")
         except Exception as e:
             print(f"Error closing database connection: {e}")
     
     def run(self):
-        """Start the application's main loop."""
+        """Start the application's main loop.
+        
+        Hosted sessions are driven by the host's main loop, so this returns
+        immediately for them.
+        """
+        if self.host is not None:
+            return
         try:
             self.window.mainloop()
         except Exception as e:
@@ -259,8 +523,14 @@ class FlashcardApp:
             self.show_error_message("Fatal Error", 
                                   "Application encountered a fatal error.")
         finally:
-            if hasattr(self, 'conn'):
+            self.flush_answers()
+            self.flush_reviews()
+            print(f"Session summary: {self.session_summary()}")
+            if self.conn is not None:
                 self.conn.close()
+            self.media.close()
+            if self.profiler is not None:
+                self.profiler.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+import sqlite3
+from collections import defaultdict, deque
+from datetime import datetime
+from statistics import median
+
+
+def save_reviews(conn, reviews):
+    """Write buffered review rows to the reviews table.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        reviews (list): (card_id, reviewed_at, correct, latency_ms, direction) tuples
+    """
+    if not reviews:
+        return
+    try:
+        conn.executemany('''
+            INSERT INTO reviews (card_id, reviewed_at, correct, latency_ms, direction)
+            VALUES (?, ?, ?, ?, ?)
+        ''', reviews)
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Error saving reviews: {e}")
+        conn.rollback()
+        raise e
+
+
+class LatencyStats:
+    """Rolling answer-latency statistics per card direction and per deck.
+
+    Recent latencies are kept in memory for choosing flip delays, and each
+    review is buffered until drain() hands the rows over to be saved.
+    """
+
+    CARD_WINDOW = 10  # Latencies remembered per card and direction
+    DECK_WINDOW = 200  # Latencies remembered per deck
+    MIN_SAMPLES = 2  # Correct answers needed before a card's delay adapts
+    DELAY_FACTOR = 1.5  # Flip delay as a multiple of the typical correct latency
+
+    def __init__(self):
+        self._cards = defaultdict(lambda: deque(maxlen=self.CARD_WINDOW))
+        self._decks = defaultdict(lambda: deque(maxlen=self.DECK_WINDOW))
+        self._pending = []
+
+    def load_history(self, conn, deck=None):
+        """Seed the per-card windows with the most recent saved correct answers.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            deck (str): Only load cards from this deck (all decks if None)
+        """
+        sql = '''
+            SELECT card_id, direction, deck, latency_ms FROM (
+                SELECT r.card_id, COALESCE(r.direction, 'forward') AS direction, f.deck, r.latency_ms,
+                       ROW_NUMBER() OVER (PARTITION BY r.card_id, r.direction
+                                          ORDER BY r.reviewed_at DESC) AS recent
+                FROM reviews r JOIN flashcards f ON f.id = r.card_id
+                WHERE r.correct = 1 AND r.latency_ms IS NOT NULL
+        '''
+        params = []
+        if deck is not None:
+            sql += ' AND f.deck = ?'
+            params.append(deck)
+        sql += ') WHERE recent <= ? ORDER BY recent DESC'
+        params.append(self.CARD_WINDOW)
+
+        for card_id, direction, card_deck, latency_ms in conn.execute(sql, params):
+            self._cards[(card_id, direction)].append(latency_ms)
+            self._decks[card_deck].append(latency_ms)
+
+    def record(self, card_id, deck, latency_ms, correct, direction='forward'):
+        """Record one answer.
+
+        Only correct answers feed the rolling windows, since the time taken
+        to give up on a card says nothing about how well it is known.
+
+        Args:
+            card_id (int): Card that was answered
+            deck (str): Deck the card belongs to
+            latency_ms (int): Time from showing the card to the answer
+            correct (bool): Whether the card was marked as known
+            direction (str): Direction the card was reviewed in
+        """
+        if correct:
+            self._cards[(card_id, direction)].append(latency_ms)
+            self._decks[deck].append(latency_ms)
+        self._pending.append((card_id, datetime.now().isoformat(), int(correct), latency_ms, direction))
+
+    def card_median(self, card_id, direction='forward'):
+        """Median recent correct latency for a card in ms, or None if unknown."""
+        samples = self._cards.get((card_id, direction))
+        return median(samples) if samples else None
+
+    def deck_median(self, deck):
+        """Median recent correct latency for a deck in ms, or None if unknown."""
+        samples = self._decks.get(deck)
+        return median(samples) if samples else None
+
+    def flip_delay(self, card_id, default, minimum, direction='forward'):
+        """Choose how long to show the front of a card.
+
+        Cards that have been answered correctly and quickly flip sooner; the
+        delay never exceeds the default, so unknown cards keep the old timing.
+
+        Args:
+            card_id (int): Card about to be shown
+            default (int): Delay for cards without enough history (ms)
+            minimum (int): Shortest delay allowed (ms)
+            direction (str): Direction the card is shown in
+
+        Returns:
+            int: Flip delay in ms
+        """
+        samples = self._cards.get((card_id, direction))
+        if not samples or len(samples) < self.MIN_SAMPLES:
+            return default
+        delay = int(median(samples) * self.DELAY_FACTOR)
+        return max(minimum, min(default, delay))
+
+    def drain(self):
+        """Return the buffered review rows and clear the buffer."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def requeue(self, reviews):
+        """Buffer drained review rows again after their write failed."""
+        self._pending[:0] = reviews
@@ -0,0 +1,84 @@
+import heapq
+import itertools
+import time
+
+
+def _card_key(card):
+    return card['id'], card.get('direction', 'forward')
+
+
+class LearningQueue:
+    """Min-heap of failed cards waiting to be shown again within a session.
+
+    A card marked unknown enters at the first learning step. Each correct
+    answer moves it to the next step, and after the last step it graduates
+    back to normal scheduling. Failing it again restarts the steps. Adding
+    and taking a card are O(log n).
+    """
+
+    DEFAULT_STEPS = (60, 600)  # Seconds until a failed card is shown again, per step
+
+    def __init__(self, steps=None, clock=time.monotonic):
+        """Initialize the queue.
+
+        Args:
+            steps (tuple): Delays in seconds for each learning step
+            clock (callable): Monotonic clock returning seconds
+        """
+        self.steps = tuple(steps) if steps else self.DEFAULT_STEPS
+        self.clock = clock
+        self._heap = []
+        self._steps = {}  # card key -> current step, for cards in the queue or on screen
+        self._order = itertools.count()  # Tie-breaker so equal times keep insertion order
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, key):
+        return key in self._steps
+
+    def _push(self, card, step):
+        self._steps[_card_key(card)] = step
+        heapq.heappush(self._heap, (self.clock() + self.steps[step], next(self._order), card))
+
+    def fail(self, card):
+        """Put a card that was marked unknown back at the first learning step."""
+        self._push(card, 0)
+
+    def advance(self, card):
+        """Move a learning card to its next step after a correct answer.
+
+        Args:
+            card (dict): Card that was marked as known
+
+        Returns:
+            bool: True if the card is still learning, False if it graduated
+                or was not in the learning queue
+        """
+        key = _card_key(card)
+        step = self._steps.get(key)
+        if step is None:
+            return False
+        if step + 1 < len(self.steps):
+            self._push(card, step + 1)
+            return True
+        del self._steps[key]
+        return False
+
+    def repeat(self, card):
+        """Show a learning card that was skipped without an answer again after its current step."""
+        step = self._steps.get(_card_key(card))
+        if step is not None:
+            self._push(card, step)
+
+    def pop_due(self):
+        """Take the card whose re-show time has passed first, or None if none is due."""
+        if self._heap and self._heap[0][0] <= self.clock():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def seconds_until_due(self):
+        """Seconds until the next learning card is due, or None if the queue is empty."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
@@ -1,7 +1,26 @@
 import sqlite3
 import csv
 import os
-from datetime import datetime
+import random
+from datetime import datetime, timedelta
+from media import MEDIA_KINDS, add_media
+from migrations import migrate
+from terms import TermStore
+
+
+# Fraction of an interval that the load balancer may shift a due date by
+LOAD_BALANCE_FUZZ = 0.1
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Cards added by add_sample_flashcards, and their deck
+SAMPLE_CARDS = [
+    ('hola', 'hello'),
+    ('gracias', 'thank you'),
+    ('por favor', 'please'),
+    ('adiós', 'goodbye')
+]
+SAMPLE_DECK = 'samples'
 
 
 def create_flashcards_db(db_path='flashcards.db'):
@@ -16,107 +35,155 @@ def create_flashcards_db(db_path='flashcards.db'):
     """
     # Connect to database (will create it if it doesn't exist)
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
 
-    # Create the flashcards table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS flashcards (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        target_word TEXT NOT NULL,          -- Word in the language being learned
-        native_word TEXT NOT NULL,          -- Translation in native language
-        last_displayed TIMESTAMP,           -- Last time the card was shown
-        last_correct TIMESTAMP,             -- Last time user answered correctly
-        correct_count INTEGER DEFAULT 0,    -- Number of times answered correctly
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-
-    # Create indexes for better performance
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_target ON flashcards(target_word)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_last_displayed ON flashcards(last_displayed)')
-
-    # Commit changes and return connection
-    conn.commit()
+    # WAL is persistent; it lets read-only report connections run alongside answer commits.
+    # With synchronous=NORMAL a commit skips the fsync (checkpoints still sync), so an answer costs
+    # a write to the WAL; a power cut can lose the last commits but never corrupts the database
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+    # Create or upgrade the tables and indexes
+    migrate(conn)
+
     return conn
 
 
+def deck_name_for_file(csv_file_path):
+    """
+    Get the deck name used for cards imported from a CSV file.
+
+    Parameters:
+    csv_file_path (str): Path to the CSV file
+
+    Returns:
+    str: Deck name (the file name without directory or extension)
+    """
+    return os.path.splitext(os.path.basename(csv_file_path))[0].strip()
+
+
+def read_csv_rows(csv_file_path):
+    """
+    Read the card rows of a deck CSV file.
+
+    A first row whose first column mentions "target_word" is a header and is
+    skipped; rows with fewer than two columns are ignored.
+
+    Parameters:
+    csv_file_path (str): Path to the CSV file
+
+    Yields:
+    list: Columns of each row (target word, native word, then optional media)
+    """
+    with open(csv_file_path, 'r', encoding='utf-8') as csv_file:
+        csv_reader = csv.reader(csv_file)
+
+        # Skip header row if it exists
+        header = next(csv_reader, None)
+        if header and "target_word" in header[0].lower():
+            pass  # Skip the header
+        else:
+            # If no header, rewind to start of file
+            csv_file.seek(0)
+
+        for row in csv_reader:
+            if len(row) >= 2:  # Ensure we have at least target and native words
+                yield row
+
+
 def add_sample_flashcards(conn):
     """
-    Add a few sample flashcards to the database.
+    Add a few sample flashcards to the SAMPLE_DECK deck, unless it already has them.
 
     Parameters:
     conn (sqlite3.Connection): Database connection
     """
-    sample_cards = [
-        ('hola', 'hello', None, None, 0),
-        ('gracias', 'thank you', None, None, 0),
-        ('por favor', 'please', None, None, 0),
-        ('adiós', 'goodbye', None, None, 0)
-    ]
-
-    cursor = conn.cursor()
-    cursor.executemany('''
-    INSERT INTO flashcards (target_word, native_word, last_displayed, last_correct, correct_count)
-    VALUES (?, ?, ?, ?, ?)
-    ''', sample_cards)
+    term_store = TermStore(conn)
+    new_cards = []
+    for target_word, native_word in SAMPLE_CARDS:
+        card_hash = term_store.add_card(target_word, native_word, SAMPLE_DECK)
+        if card_hash is not None:
+            new_cards.append((SAMPLE_DECK, term_store.term_id(target_word), term_store.term_id(native_word),
+                              card_hash))
+    conn.executemany(_INSERT_CARD, new_cards)
 
     conn.commit()
 
 
-def import_from_csv(conn, csv_file_path):
+_INSERT_CARD = '''
+INSERT INTO flashcards (last_displayed, last_correct, correct_count, deck, target_term_id, native_term_id,
+                        content_hash)
+VALUES (NULL, NULL, 0, ?, ?, ?, ?)
+'''
+
+
+def import_from_csv(conn, csv_file_path, deck=None, term_store=None):
     """
     Import flashcards from a CSV file.
 
+    Cards whose normalized (target, native) pair is already in the deck are
+    skipped; the same pair in another deck gets its own card. Words are
+    interned in the terms table and cards refer to them by id. An optional
+    third and fourth column name an image and an audio file for the card,
+    stored as references in the media table.
+
     Parameters:
     conn (sqlite3.Connection): Database connection
     csv_file_path (str): Path to the CSV file
+    deck (str): Deck name for the imported cards (defaults to the file name)
+    term_store (TermStore): Shared term cache and hash sets for bulk imports
+        of several files (a new one is created if None)
 
     Returns:
-    int: Number of records imported
+    int: Number of records imported, or None if the file could not be
+        imported (nothing is written then)
     """
     if not os.path.exists(csv_file_path):
         print(f"Error: CSV file not found at {csv_file_path}")
-        return 0
+        return None
+
+    if deck is None:
+        deck = deck_name_for_file(csv_file_path)
+    if term_store is None:
+        term_store = TermStore(conn)
 
     cursor = conn.cursor()
-    counter = 0
+    new_cards = []
+    imported = 0
 
     try:
-        with open(csv_file_path, 'r', encoding='utf-8') as csv_file:
-            csv_reader = csv.reader(csv_file)
-
-            # Skip header row if it exists
-            header = next(csv_reader, None)
-            if header and "target_word" in header[0].lower():
-                pass  # Skip the header
-            else:
-                # If no header, rewind to start of file
-                csv_file.seek(0)
-
-            for row in csv_reader:
-                if len(row) >= 2:  # Ensure we have at least target and native words
-                    target_word = row[0].strip()
-                    native_word = row[1].strip()
-
-                    # Check if the card already exists
-                    cursor.execute(
-                        "SELECT id FROM flashcards WHERE target_word = ? AND native_word = ?",
-                        (target_word, native_word)
-                    )
-                    existing = cursor.fetchone()
-
-                    if not existing:
-                        cursor.execute('''
-                        INSERT INTO flashcards (target_word, native_word, last_displayed, last_correct, correct_count)
-                        VALUES (?, ?, NULL, NULL, 0)
-                        ''', (target_word, native_word))
-                        counter += 1
-
+        for row in read_csv_rows(csv_file_path):
+            target_word = row[0].strip()
+            native_word = row[1].strip()
+
+            # Skip cards the deck already has (hash of the normalized pair)
+            card_hash = term_store.add_card(target_word, native_word, deck)
+            if card_hash is None:
+                continue
+
+            new_cards.append((
+                deck, term_store.term_id(target_word), term_store.term_id(native_word), card_hash
+            ))
+            imported += 1
+
+            # Cards with media are inserted on their own to learn their id
+            media = [(kind, path.strip()) for kind, path in zip(MEDIA_KINDS, row[2:4])
+                     if path.strip()]
+            if media:
+                card = new_cards.pop()
+                cursor.executemany(_INSERT_CARD, new_cards)
+                new_cards = []
+                cursor.execute(_INSERT_CARD, card)
+                for kind, path in media:
+                    add_media(conn, cursor.lastrowid, kind, path)
+
+        cursor.executemany(_INSERT_CARD, new_cards)
         conn.commit()
-        return counter
+        return imported
     except Exception as e:
         print(f"Error importing from CSV: {e}")
-        return 0
+        conn.rollback()
+        term_store.reset()
+        return None
 
 
 def get_all_csv_files(directory):
@@ -137,24 +204,104 @@ def get_all_csv_files(directory):
     return csv_files
 
 
-def get_cards_for_review(conn, days_multiplier=7):
+def deck_file_signature(csv_file_path):
+    """
+    Get the modification time and size of a CSV file, used to tell if it changed.
+
+    Parameters:
+    csv_file_path (str): Path to the CSV file
+
+    Returns:
+    tuple: (mtime_ns, size)
+    """
+    stat = os.stat(csv_file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_deck_file_signatures(conn):
+    """
+    Get the signatures of the CSV files as they were when last imported.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    dict: absolute path -> (mtime_ns, size)
+    """
+    return {path: (mtime_ns, size) for path, mtime_ns, size in
+            conn.execute('SELECT path, mtime_ns, size FROM deck_files')}
+
+
+def record_deck_file(conn, csv_file_path, signature=None):
+    """
+    Remember that a CSV file has been imported, so it is only read again once it changes.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    csv_file_path (str): Path to the imported CSV file
+    signature (tuple): (mtime_ns, size) the file had when it was read (stat now if None)
+    """
+    mtime_ns, size = signature or deck_file_signature(csv_file_path)
+    conn.execute('''
+        INSERT INTO deck_files (path, mtime_ns, size, imported_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET
+            mtime_ns = excluded.mtime_ns, size = excluded.size, imported_at = excluded.imported_at
+    ''', (os.path.abspath(csv_file_path), mtime_ns, size, datetime.now().strftime(TIMESTAMP_FORMAT)))
+    conn.commit()
+
+
+def get_cards_for_review(conn, days_multiplier=7, deck=None, directions=('forward',)):
     """
     Get flashcards that are due for review based on their correct_count and last_correct date.
     
+    Cards with a stored due_date are due once it has passed. Cards without one
+    (never answered correctly) fall back to the correct_count * days_multiplier
+    interval from last_correct.
+    
+    Forward reviews use the scheduling columns on flashcards; other directions
+    use their row in card_directions, and a card with no row yet is new in that
+    direction. All requested directions are read with one UNION ALL query.
+    
     Parameters:
     conn (sqlite3.Connection): Database connection
     days_multiplier (int): Number of days to wait per correct answer
+    deck (str): Only return cards from this deck (all decks if None)
+    directions (tuple): Directions to review, e.g. ('forward', 'reverse')
     
     Returns:
     list: List of dictionaries containing card information
     """
     cursor = conn.cursor()
-    cursor.execute('''
-    SELECT id, target_word, native_word, last_displayed, last_correct, correct_count
-    FROM flashcards
-    WHERE last_correct IS NULL
-       OR datetime(last_correct, '+' || (correct_count * ?) || ' days') <= datetime('now')
-    ''', (days_multiplier,))
+    now = datetime.now().strftime(TIMESTAMP_FORMAT)
+    deck_filter = ' AND f.deck = ?' if deck is not None else ''
+    
+    parts = []
+    params = []
+    for direction in directions:
+        if direction == 'forward':
+            parts.append('''
+    SELECT f.id, f.target_word, f.native_word, f.last_displayed, f.last_correct, f.correct_count,
+           f.deck, f.due_date, 'forward'
+    FROM flashcards_with_text f
+    WHERE ((f.due_date IS NULL
+            AND (f.last_correct IS NULL
+                 OR datetime(f.last_correct, '+' || (f.correct_count * ?) || ' days') <= datetime('now')))
+       OR f.due_date <= ?)''' + deck_filter)
+            params += [days_multiplier, now]
+        else:
+            parts.append('''
+    SELECT f.id, f.target_word, f.native_word, d.last_displayed, d.last_correct, COALESCE(d.correct_count, 0),
+           f.deck, d.due_date, ?
+    FROM flashcards_with_text f
+    LEFT JOIN card_directions d ON d.card_id = f.id AND d.direction = ?
+    WHERE (d.due_date IS NULL OR d.due_date <= ?)''' + deck_filter)
+            params += [direction, direction, now]
+        if deck is not None:
+            params.append(deck)
+    
+    if not parts:
+        return []
+    cursor.execute(' UNION ALL '.join(parts), params)
     
     cards = []
     for row in cursor.fetchall():
@@ -164,28 +311,307 @@ def get_cards_for_review(conn, days_multiplier=7):
             'native_word': row[2],
             'last_displayed': row[3],
             'last_correct': row[4],
-            'correct_count': row[5]
+            'correct_count': row[5],
+            'deck': row[6],
+            'due_date': row[7],
+            'direction': row[8]
         })
     return cards
 
 
-def update_card_status(conn, card_id, correct=True):
-    """Update a card's status after review."""
+# Due dates of every direction of every card, with the card's deck
+_ALL_DUE_DATES = '''
+    SELECT deck, due_date FROM flashcards
+    UNION ALL
+    SELECT f.deck, d.due_date FROM card_directions d JOIN flashcards f ON f.id = d.card_id
+'''
+
+
+def workload_query(today, end, deck=None):
+    """
+    Build the query forecast_workload runs.
+    
+    Parameters:
+    today (datetime): Midnight of day 0
+    end (str): Timestamp after the last forecast day
+    deck (str): Only count cards from this deck (all decks if None)
+    
+    Returns:
+    tuple: (SQL, parameters) returning (day index, count) rows
+    """
+    sql = '''
+    SELECT MAX(julianday(date(due_date)) - julianday(?), 0) AS day, COUNT(*)
+    FROM (''' + _ALL_DUE_DATES + ''')
+    WHERE due_date < ?
+    '''
+    params = [today.strftime('%Y-%m-%d'), end]
+    if deck is not None:
+        sql += ' AND deck = ?'
+        params.append(deck)
+    sql += ' GROUP BY day'
+    return sql, params
+
+
+def forecast_workload(conn, days=30, deck=None):
+    """
+    Count how many reviews fall due on each of the next few days.
+    
+    Uses a GROUP BY over the indexed due_date columns of flashcards and
+    card_directions, so each review direction counts separately. Overdue
+    cards are counted on day 0; cards that have never been scheduled are
+    not included.
+    
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    days (int): Number of days to forecast, starting with today
+    deck (str): Only count cards from this deck (all decks if None)
+    
+    Returns:
+    list: Number of cards due on each day, index 0 being today
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = (today + timedelta(days=days)).strftime(TIMESTAMP_FORMAT)
+    sql, params = workload_query(today, end, deck)
+    
+    counts = [0] * days
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    for day, count in cursor.fetchall():
+        counts[int(day)] += count
+    return counts
+
+
+def _load_balanced_interval(cursor, deck, interval, today):
+    """
+    Pick the least busy day near the target interval.
+    
+    The due date may move by up to LOAD_BALANCE_FUZZ of the interval (at
+    least one day) so that cards answered together do not all fall due on
+    the same day. Ties go to the day closest to the original interval.
+    
+    Parameters:
+    cursor (sqlite3.Cursor): Database cursor
+    deck (str): Deck whose workload is balanced
+    interval (int): Target interval in days
+    today (datetime): Start of the current day
+    
+    Returns:
+    int: Interval in days to schedule the card with
+    """
+    fuzz = max(1, round(interval * LOAD_BALANCE_FUZZ))
+    low = max(1, interval - fuzz)
+    high = interval + fuzz
+    
+    cursor.execute('''
+    SELECT CAST(julianday(date(due_date)) - julianday(?) AS INTEGER) AS day, COUNT(*)
+    FROM (''' + _ALL_DUE_DATES + ''')
+    WHERE deck IS ? AND due_date >= ? AND due_date < ?
+    GROUP BY day
+    ''', (
+        today.strftime('%Y-%m-%d'),
+        deck,
+        (today + timedelta(days=low)).strftime(TIMESTAMP_FORMAT),
+        (today + timedelta(days=high + 1)).strftime(TIMESTAMP_FORMAT)
+    ))
+    load = dict(cursor.fetchall())
+    
+    candidates = list(range(low, high + 1))
+    random.shuffle(candidates)
+    return min(candidates, key=lambda day: (load.get(day, 0), abs(day - interval)))
+
+
+def _next_due_date(cursor, deck, correct_count, days_multiplier, load_balance, now):
+    """Due date after a correct answer that raises correct_count by one."""
+    interval = ((correct_count or 0) + 1) * days_multiplier
+    if load_balance:
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        interval = _load_balanced_interval(cursor, deck, interval, today)
+    return (now + timedelta(days=interval)).strftime(TIMESTAMP_FORMAT)
+
+
+def _update_direction_status(conn, card_id, direction, correct, days_multiplier, load_balance):
+    """Update the scheduling state of a non-forward direction of a card."""
+    cursor = conn.cursor()
+    now = datetime.now()
+    timestamp = now.isoformat()
+    
+    try:
+        cursor.execute('''
+            SELECT f.deck, d.correct_count
+            FROM flashcards f
+            LEFT JOIN card_directions d ON d.card_id = f.id AND d.direction = ?
+            WHERE f.id = ?
+        ''', (direction, card_id))
+        card = cursor.fetchone()
+        if card is None:
+            raise sqlite3.Error(f"No card found with id {card_id}")
+        deck, correct_count = card[0], card[1] or 0
+        
+        if correct:
+            last_correct = timestamp
+            correct_count += 1
+            due_date = _next_due_date(cursor, deck, card[1], days_multiplier, load_balance, now)
+        else:
+            last_correct = None
+            correct_count = max(correct_count - 1, 0)
+            due_date = now.strftime(TIMESTAMP_FORMAT)
+        
+        cursor.execute('''
+            INSERT INTO card_directions (card_id, direction, last_displayed, last_correct, correct_count, due_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (card_id, direction) DO UPDATE SET
+                last_displayed = excluded.last_displayed,
+                last_correct = COALESCE(excluded.last_correct, last_correct),
+                correct_count = excluded.correct_count,
+                due_date = excluded.due_date
+        ''', (card_id, direction, timestamp, last_correct, correct_count, due_date))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error occurred: {e}")  # Debug
+        conn.rollback()
+        raise e
+
+
+def load_balanced_interval(conn, deck, interval, now=None):
+    """
+    Pick the least busy day near a target interval for a deck.
+    
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    deck (str): Deck whose workload is balanced
+    interval (int): Target interval in days
+    now (datetime): Current time (defaults to now)
+    
+    Returns:
+    int: Interval in days to schedule the card with
+    """
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return _load_balanced_interval(conn.cursor(), deck, interval, today)
+
+
+def next_review_state(card, correct, days_multiplier=7, now=None, interval_picker=None):
+    """
+    Compute a card's scheduling state after an answer without touching the database.
+    
+    Applies the same rules as update_card_status.
+    
+    Parameters:
+    card (dict): Card as returned by get_cards_for_review
+    correct (bool): Whether the card was marked as known
+    days_multiplier (int): Number of days to wait per correct answer
+    now (datetime): Time of the answer (defaults to now)
+    interval_picker (callable): Maps the target interval in days to the one
+        used, e.g. to apply load balancing
+    
+    Returns:
+    dict: Copy of the card with updated last_displayed, last_correct,
+        correct_count and due_date
+    """
+    now = now or datetime.now()
+    timestamp = now.isoformat()
+    correct_count = card.get('correct_count') or 0
+    state = dict(card, last_displayed=timestamp)
+    
+    if correct:
+        interval = (correct_count + 1) * days_multiplier
+        if interval_picker is not None:
+            interval = interval_picker(interval)
+        state.update(
+            last_correct=timestamp,
+            correct_count=correct_count + 1,
+            due_date=(now + timedelta(days=interval)).strftime(TIMESTAMP_FORMAT)
+        )
+    else:
+        state.update(
+            correct_count=max(correct_count - 1, 0),
+            due_date=now.strftime(TIMESTAMP_FORMAT)
+        )
+    return state
+
+
+def save_review_states(conn, cards):
+    """
+    Write the scheduling state of several cards in one transaction.
+    
+    A state only replaces one that was displayed at the same time or earlier,
+    so when several sessions or a sync import write the same card, the
+    latest answer wins whatever order the writes commit in.
+    
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    cards (list): Card dicts, e.g. from next_review_state
+    """
+    forward = []
+    other = []
+    for card in cards:
+        values = (card['last_displayed'], card['last_correct'], card['correct_count'], card['due_date'])
+        if card.get('direction', 'forward') == 'forward':
+            forward.append(values + (card['id'], card['last_displayed']))
+        else:
+            other.append((card['id'], card['direction']) + values)
+    
+    try:
+        conn.executemany('''
+            UPDATE flashcards
+            SET last_displayed = ?, last_correct = ?, correct_count = ?, due_date = ?
+            WHERE id = ? AND (last_displayed IS NULL OR last_displayed <= ?)
+        ''', forward)
+        conn.executemany('''
+            INSERT INTO card_directions (card_id, direction, last_displayed, last_correct, correct_count, due_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (card_id, direction) DO UPDATE SET
+                last_displayed = excluded.last_displayed,
+                last_correct = excluded.last_correct,
+                correct_count = excluded.correct_count,
+                due_date = excluded.due_date
+            WHERE card_directions.last_displayed IS NULL
+               OR card_directions.last_displayed <= excluded.last_displayed
+        ''', other)
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error occurred: {e}")  # Debug
+        conn.rollback()
+        raise e
+
+
+def update_card_status(conn, card_id, correct=True, days_multiplier=7, load_balance=False,
+                       direction='forward'):
+    """Update a card's status after review.
+    
+    A correct answer schedules the card (correct_count + 1) * days_multiplier
+    days ahead, optionally shifted by the load balancer to a quieter day.
+    An incorrect answer makes the card due again immediately. Directions
+    other than 'forward' are scheduled in card_directions.
+    """
+    if direction != 'forward':
+        _update_direction_status(conn, card_id, direction, correct, days_multiplier, load_balance)
+        return
+    
     cursor = conn.cursor()
-    now = datetime.now().isoformat()
+    now = datetime.now()
+    timestamp = now.isoformat()
     
     print(f"\nAttempting to update card {card_id} (correct={correct})")  # Debug
     
     try:
         if correct:
+            cursor.execute('SELECT correct_count, deck FROM flashcards WHERE id = ?', (card_id,))
+            card = cursor.fetchone()
+            if card is None:
+                raise sqlite3.Error(f"No card found with id {card_id}")
+            
+            due_date = _next_due_date(cursor, card[1], card[0], days_multiplier, load_balance, now)
+            
             sql = '''
                 UPDATE flashcards
                 SET last_displayed = ?,
                     last_correct = ?,
-                    correct_count = correct_count + 1
+                    correct_count = correct_count + 1,
+                    due_date = ?
                 WHERE id = ?
             '''
-            params = (now, now, card_id)
+            params = (timestamp, timestamp, due_date, card_id)
         else:
             sql = '''
                 UPDATE flashcards
@@ -193,10 +619,11 @@ def update_card_status(conn, card_id, correct=True):
                     correct_count = CASE 
                         WHEN correct_count > 0 THEN correct_count - 1
                         ELSE 0
-                    END
+                    END,
+                    due_date = ?
                 WHERE id = ?
             '''
-            params = (now, card_id)
+            params = (timestamp, now.strftime(TIMESTAMP_FORMAT), card_id)
         
         print(f"Executing SQL: {sql}")  # Debug
         print(f"Parameters: {params}")   # Debug
@@ -251,11 +678,18 @@ def main():
     csv_files = get_all_csv_files(data_dir)
 
     total_imported = 0
+    term_store = TermStore(conn)
     if csv_files:
         print(f"Found {len(csv_files)} CSV files in the data directory:")
         for csv_file in csv_files:
             print(f"  - {os.path.basename(csv_file)}")
-            imported = import_from_csv(conn, csv_file)
+            signature = deck_file_signature(csv_file)
+            imported = import_from_csv(conn, csv_file, term_store=term_store)
+            if imported is None:
+                print("    Import failed")
+                continue
+            # Only a committed import marks the file as done
+            record_deck_file(conn, csv_file, signature)
             total_imported += imported
             print(f"    Imported {imported} new flashcards")
     else:
@@ -263,7 +697,7 @@ def main():
 
     # Query to verify data
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM flashcards')
+    cursor.execute('SELECT * FROM flashcards_with_text')
     rows = cursor.fetchall()
 
     print(f"\nDatabase Summary:")
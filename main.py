@@ -1,96 +1,213 @@
-from random import random
-from tkinter import Tk, Canvas, PhotoImage, Button, Label
-import pandas
+import csv
 import random
-
-
-global card_text
-global word_index
-global card_title
-global card_word
-
-word_dict = {}
-card_text = {}
-
-try:
-    data = pandas.read_csv("data/Italian_500 .csv")
-    word_dict = data.to_dict(orient="records")
-except FileNotFoundError:
-    print("Error: Could not find 'data/Italian_500 .csv'. Please ensure the file exists in the data directory.")
-    exit(1)  # Use exit code 1 to indicate error
-
-def pick_word():
-    global word_index
-    word_index = random.randint(0, len(word_dict) - 1)
-    picked_word = word_dict[word_index]
-    print(picked_word)
-    return picked_word
-
-BACKGROUND_COLOR = "#B1DDC6"
-
-def next_card():
-    global card_text, flip_timer
-    if 'flip_timer' in globals():
-        window.after_cancel(flip_timer)
-    card_text = pick_word()
-    print(type(card_text))
-    front_word = card_text["Italian"]
-    canvas.itemconfig(card_title, text="Italian", fill="black")
-    canvas.itemconfig(card_word, text=front_word, fill="black")
-    back_word = card_text["English"]
-    print(front_word, back_word)
-    flip_timer = window.after(5000, func=flip_card)
-
-
-def flip_card():
-    back_word = card_text["English"]
-    canvas.itemconfig(card_title, text="English", fill="black")
-    canvas.itemconfig(card_word, text=back_word, fill="black")
-
-def is_known():
-    global word_dict
-    del word_dict[word_index]
-    if not word_dict:
-        canvas.itemconfig(card_word, text="No more words!")
-        return
-    next_card()
-    del word_dict[word_index]
-    next_card()
-
-    #delete picked_word from word_dict
-
-
+import sys
+from tkinter import Tk, Canvas, PhotoImage, Button
+
+
+DEFAULT_DECK = "data/Italian_500 .csv"
+
+
+class CardPool:
+    """Cards left to study, kept in two parallel lists of words.
+
+    Picking a card is a random index; retiring a known card moves the last
+    card into its slot and drops the last slot, so both are O(1) however
+    large the deck is.
+    """
+
+    def __init__(self):
+        self.fronts = []
+        self.backs = []
+
+    def __len__(self):
+        return len(self.fronts)
+
+    def extend(self, rows, limit=None):
+        """Add cards from an iterator of CSV rows, reading at most limit rows.
+
+        Rows with fewer than two columns are skipped.
+
+        Args:
+            rows: Iterator of CSV rows (lists of strings)
+            limit (int): Most rows to read (all if None)
+
+        Returns:
+            int: Number of rows read; less than limit once the rows run out
+        """
+        read = 0
+        for row in rows:
+            read += 1
+            if len(row) >= 2:
+                self.fronts.append(row[0].strip())
+                self.backs.append(row[1].strip())
+            if read == limit:
+                break
+        return read
+
+    def pick(self, rng=random):
+        """Return the index of a random card (the pool must not be empty)."""
+        return rng.randrange(len(self.fronts))
+
+    def card(self, index):
+        """Return the (front, back) words of a card."""
+        return self.fronts[index], self.backs[index]
+
+    def retire(self, index):
+        """Remove a card by moving the last card into its place."""
+        last = len(self.fronts) - 1
+        self.fronts[index] = self.fronts[last]
+        self.backs[index] = self.backs[last]
+        self.fronts.pop()
+        self.backs.pop()
+
+
+class QuickStudyApp:
+    """Database-free quick study of a CSV deck.
+
+    The first row of the file names the two languages. Only the first
+    INITIAL_CARDS rows are read before the first card is shown; the rest of
+    the file is streamed into the pool in chunks between cards, so start-up
+    takes the same time for any deck size. Cards are picked at random and
+    known cards are retired for the rest of the session; nothing is saved.
+    """
+
+    BACKGROUND_COLOR = "#B1DDC6"
+    FLIP_DELAY = 5000  # Time before card flips (ms)
+    INITIAL_CARDS = 200  # Rows read before the first card is shown
+    LOAD_CHUNK = 5000  # Rows read per idle callback while the rest of the file loads
+
+    def __init__(self, csv_path=DEFAULT_DECK, seed=None):
+        """Open the deck and build the window.
+
+        Args:
+            csv_path (str): CSV file with a header row naming the two languages
+            seed (int): Random seed, for a repeatable card order
+        """
+        self.csv_path = csv_path
+        self.rng = random.Random(seed)
+        self.pool = CardPool()
+        self.current = None  # Pool index of the card on screen
+        self.flip_timer = None
+        self.load_timer = None
+
+        self.file = open(csv_path, 'r', encoding='utf-8', newline='')
+        self.rows = csv.reader(self.file)
+        header = next(self.rows, None) or []
+        self.front_lang = header[0].strip() if len(header) > 0 else "Front"
+        self.back_lang = header[1].strip() if len(header) > 1 else "Back"
+        self._read_rows(self.INITIAL_CARDS)
+
+        self.setup_ui()
+
+    def _read_rows(self, limit):
+        """Read up to limit more rows; close the file once it is exhausted."""
+        if self.rows is None:
+            return
+        if self.pool.extend(self.rows, limit) < limit:
+            self.file.close()
+            self.rows = None
+
+    def _load_more(self):
+        """Stream the next chunk of the file into the pool from the event loop."""
+        self.load_timer = None
+        was_empty = not self.pool
+        self._read_rows(self.LOAD_CHUNK)
+        if self.rows is not None:
+            self.load_timer = self.window.after_idle(self._load_more)
+        if was_empty and self.pool:
+            self.next_card()
+
+    def setup_ui(self):
+        """Set up the window, card and buttons."""
+        self.window = Tk()
+        self.window.title(f"Flashy - Quick Study - {self.front_lang}")
+        self.window.config(padx=50, pady=50, bg=self.BACKGROUND_COLOR)
+
+        self.canvas = Canvas(self.window, width=800, height=526)
+        self.canvas.config(bg=self.BACKGROUND_COLOR, highlightthickness=0)
+        self.canvas.grid(row=0, column=0, columnspan=2)
+
+        self.card_front_img = PhotoImage(master=self.window, file="images/card_front.png")
+        self.card_back_img = PhotoImage(master=self.window, file="images/card_back.png")
+        self.card_background = self.canvas.create_image(400, 263, image=self.card_front_img)
+        self.card_title = self.canvas.create_text(400, 150, text="", font=("Arial", 40, "italic"))
+        self.card_word = self.canvas.create_text(400, 263, text="", font=("Arial", 60, "bold"))
+
+        cross_image = PhotoImage(master=self.window, file="images/wrong.png")
+        unknown_button = Button(self.window, image=cross_image, highlightthickness=0,
+                                command=self.next_card, bg=self.BACKGROUND_COLOR)
+        unknown_button.grid(row=1, column=0)
+
+        check_image = PhotoImage(master=self.window, file="images/right.png")
+        known_button = Button(self.window, image=check_image, highlightthickness=0,
+                              command=self.is_known, bg=self.BACKGROUND_COLOR)
+        known_button.grid(row=1, column=1)
+
+        # Save references to prevent garbage collection
+        unknown_button.image = cross_image
+        known_button.image = check_image
+
+    def next_card(self):
+        """Show a random card that has not been marked known."""
+        if self.flip_timer is not None:
+            self.window.after_cancel(self.flip_timer)
+            self.flip_timer = None
+
+        self.canvas.itemconfig(self.card_background, image=self.card_front_img)
+        if not self.pool:
+            self.current = None
+            self.canvas.itemconfig(self.card_title, text="", fill="black")
+            # Still loading: _load_more shows a card once one arrives
+            text = "Loading..." if self.rows is not None else "No more words!"
+            self.canvas.itemconfig(self.card_word, text=text, fill="black")
+            return
+
+        self.current = self.pool.pick(self.rng)
+        front_word, _ = self.pool.card(self.current)
+        self.canvas.itemconfig(self.card_title, text=self.front_lang, fill="black")
+        self.canvas.itemconfig(self.card_word, text=front_word, fill="black")
+        self.flip_timer = self.window.after(self.FLIP_DELAY, self.flip_card)
+
+    def flip_card(self):
+        """Flip the card to show the translation."""
+        self.flip_timer = None
+        if self.current is None:
+            return
+        _, back_word = self.pool.card(self.current)
+        self.canvas.itemconfig(self.card_background, image=self.card_back_img)
+        self.canvas.itemconfig(self.card_title, text=self.back_lang, fill="white")
+        self.canvas.itemconfig(self.card_word, text=back_word, fill="white")
+
+    def is_known(self):
+        """Retire the current card for the rest of the session and show the next one."""
+        if self.current is not None:
+            self.pool.retire(self.current)
+            self.current = None
+        self.next_card()
+
+    def run(self):
+        """Show the first card and run the event loop."""
+        self.next_card()
+        if self.rows is not None:
+            self.load_timer = self.window.after_idle(self._load_more)
+        try:
+            self.window.mainloop()
+        finally:
+            if self.rows is not None:
+                self.file.close()
+                self.rows = None
 
 
 def main():
-    # ---------------------------- UI SETUP ------------------------------- #
-    global canvas, window, card_title, card_word
-    
-    window = Tk()  # Create window here instead
-    window.title("Flashy")
-    window.config(padx=50, pady=50, bg=BACKGROUND_COLOR)
-
-    canvas = Canvas(width=800, height=526)  # Create canvas here instead
-    canvas.config(bg=BACKGROUND_COLOR, highlightthickness=0)
-    canvas.grid(row=0, column=0, columnspan=2)
-
-    card_front_img = PhotoImage(file="images/card_front.png")
-    card_back_img = PhotoImage(file="images/card_back.png")
-    card_background = canvas.create_image(400, 263, image=card_front_img)
-    card_title = canvas.create_text(400, 150, text="", font=("Ariel", 40, "italic"))
-    card_word = canvas.create_text(400, 263, text="", font=("Ariel", 60, "bold"))
-
-    cross_image = PhotoImage(file="images/wrong.png")
-    unknown_button = Button(image=cross_image, highlightthickness=0, command=next_card)
-    unknown_button.grid(row=1, column=0)
-
-    check_image = PhotoImage(file="images/right.png")
-    known_button = Button(image=check_image, highlightthickness=0, command=is_known)
-    known_button.grid(row=1, column=1)
-
-    next_card()
+    """Usage: python main.py [deck.csv]"""
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DECK
+    try:
+        app = QuickStudyApp(csv_path)
+    except FileNotFoundError:
+        print(f"Error: Could not find '{csv_path}'. Please ensure the file exists.")
+        sys.exit(1)  # Use exit code 1 to indicate error
+    app.run()
 
-    window.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
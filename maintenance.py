@@ -0,0 +1,255 @@
+import argparse
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from load_db import TIMESTAMP_FORMAT, workload_query
+from migrations import migrate
+
+
+# Default time budget for a maintenance run (seconds)
+DEFAULT_BUDGET = 10
+
+# Free pages released per incremental_vacuum call, so the budget is checked often
+VACUUM_CHUNK_PAGES = 1000
+
+# Rows sampled per index by ANALYZE; keeps it fast on large tables
+ANALYSIS_LIMIT = 1000
+
+# Queries the application runs most, used to compare plans before and after
+PLAN_QUERIES = {
+    'due cards': (
+        "SELECT id FROM flashcards WHERE deck = ? AND due_date <= ?",
+        ('', '9999-12-31 00:00:00')),
+    'due reverse cards': (
+        "SELECT card_id FROM card_directions WHERE direction = ? AND due_date <= ?",
+        ('reverse', '9999-12-31 00:00:00')),
+    # The same SQL forecast_workload runs for one deck
+    'workload forecast': workload_query(datetime(2000, 1, 1), '9999-12-31 00:00:00', deck=''),
+    'card review history': (
+        "SELECT latency_ms FROM reviews WHERE card_id = ? AND correct = 1 ORDER BY reviewed_at DESC",
+        (1,)),
+    'card media': (
+        "SELECT kind, path FROM media WHERE card_id = ?",
+        (1,)),
+}
+
+
+def database_size(conn):
+    """
+    Measure the database file from its page counts.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    dict: page_size, pages, free_pages and bytes
+    """
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    pages = conn.execute('PRAGMA page_count').fetchone()[0]
+    free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return {'page_size': page_size, 'pages': pages, 'free_pages': free_pages, 'bytes': page_size * pages}
+
+
+def query_plans(conn):
+    """
+    Get the plan and run time of each query in PLAN_QUERIES.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    dict: name -> (plan text, milliseconds)
+    """
+    plans = {}
+    for name, (sql, params) in PLAN_QUERIES.items():
+        plan = '; '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        plans[name] = (plan, (time.perf_counter() - start) * 1000)
+    return plans
+
+
+def full_vacuum(conn, progress=print):
+    """
+    Rebuild the database file with VACUUM, switching it to auto_vacuum=INCREMENTAL.
+
+    Databases created before schema version 9 need this once before the
+    incremental vacuum can release pages. It rewrites every page and holds
+    the write lock throughout, so it is only run on request, never within a
+    time budget.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    progress (callable): Called with progress messages
+
+    Returns:
+    bool: True if the file was rebuilt, False if it already used INCREMENTAL
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return False
+    conn.commit()
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    pages = conn.execute('PRAGMA page_count').fetchone()[0]
+    progress(f"Rebuilding {pages:,} pages with VACUUM")
+    conn.execute('VACUUM')
+    return True
+
+
+def _deadline_handler(deadline):
+    """Progress handler that interrupts the running statement once the deadline has passed."""
+    return lambda: 1 if time.monotonic() > deadline else 0
+
+
+def run_maintenance(conn, budget=DEFAULT_BUDGET, progress=print):
+    """
+    Check and compact the database within a time budget.
+
+    Runs PRAGMA quick_check, releases free pages with incremental_vacuum,
+    then runs ANALYZE and PRAGMA optimize. A statement still running when
+    the budget is spent is interrupted, and the remaining steps are skipped.
+    The incremental vacuum is also skipped until full_vacuum has switched
+    the file to auto_vacuum=INCREMENTAL. Each run is recorded in
+    maintenance_runs.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    budget (float): Seconds the run may take
+    progress (callable): Called with progress messages
+
+    Returns:
+    dict: problems (quick_check messages), freed_pages, size_before,
+        size_after, steps (name -> 'done', 'interrupted' or 'skipped')
+        and seconds
+    """
+    started_at = datetime.now()
+    start = time.monotonic()
+    deadline = start + budget
+    size_before = database_size(conn)
+    report = {'problems': [], 'freed_pages': 0, 'size_before': size_before, 'steps': {}}
+
+    def quick_check():
+        rows = [row[0] for row in conn.execute('PRAGMA quick_check')]
+        report['problems'] = [] if rows == ['ok'] else rows
+
+    def vacuum():
+        # Only files with auto_vacuum=INCREMENTAL can release pages
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            progress("  auto_vacuum is not INCREMENTAL; run 'python maintenance.py --full-vacuum' once")
+            return 'skipped'
+        while time.monotonic() < deadline:
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not free:
+                break
+            conn.execute(f'PRAGMA incremental_vacuum({VACUUM_CHUNK_PAGES})').fetchall()
+            report['freed_pages'] += min(free, VACUUM_CHUNK_PAGES)
+        if conn.execute('PRAGMA freelist_count').fetchone()[0]:
+            raise sqlite3.OperationalError("interrupted")
+
+    def analyze():
+        conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+        conn.execute('ANALYZE')
+        conn.commit()
+
+    def optimize():
+        conn.execute('PRAGMA optimize')
+
+    conn.commit()
+    conn.set_progress_handler(_deadline_handler(deadline), 1000)
+    completed = True
+    try:
+        for name, step in (('quick_check', quick_check), ('incremental vacuum', vacuum),
+                           ('analyze', analyze), ('optimize', optimize)):
+            if time.monotonic() >= deadline:
+                report['steps'][name] = 'skipped'
+                completed = False
+                progress(f"  {name}: skipped, time budget used up")
+                continue
+            step_start = time.monotonic()
+            try:
+                report['steps'][name] = step() or 'done'
+            except sqlite3.OperationalError as e:
+                if 'interrupted' not in str(e):
+                    raise
+                conn.rollback()
+                report['steps'][name] = 'interrupted'
+                completed = False
+            progress(f"  {name}: {report['steps'][name]} ({time.monotonic() - step_start:.2f}s)")
+    finally:
+        conn.set_progress_handler(None, 0)
+
+    report['size_after'] = database_size(conn)
+    report['seconds'] = time.monotonic() - start
+    conn.execute('''
+        INSERT INTO maintenance_runs (started_at, seconds, problems, freed_pages, size_before, size_after,
+                                      completed)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (started_at.strftime(TIMESTAMP_FORMAT), report['seconds'], len(report['problems']),
+          report['freed_pages'], size_before['bytes'], report['size_after']['bytes'], completed))
+    conn.commit()
+    return report
+
+
+def maintenance_due(conn, interval_days=7):
+    """
+    Check whether the last maintenance run is older than the interval.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    interval_days (int): Days between runs
+
+    Returns:
+    bool: True if maintenance has never run or last ran before the interval
+    """
+    last = conn.execute('SELECT MAX(started_at) FROM maintenance_runs').fetchone()[0]
+    if last is None:
+        return True
+    return datetime.strptime(last, TIMESTAMP_FORMAT) < datetime.now() - timedelta(days=interval_days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check, compact and analyze the flashcard database.")
+    parser.add_argument('db_path', nargs='?', default='flashcards.db')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help=f"Seconds the run may take (default: {DEFAULT_BUDGET})")
+    parser.add_argument('--full-vacuum', action='store_true',
+                        help="First rebuild the file once with VACUUM to enable incremental vacuum "
+                             "(not limited by the budget)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path)
+    try:
+        migrate(conn)
+        if args.full_vacuum and not full_vacuum(conn):
+            print("auto_vacuum is already INCREMENTAL; no full VACUUM needed")
+        plans_before = query_plans(conn)
+        print(f"Maintaining {args.db_path} (budget {args.budget:g}s)")
+        report = run_maintenance(conn, budget=args.budget)
+        plans_after = query_plans(conn)
+    finally:
+        conn.close()
+
+    if report['steps'].get('quick_check') != 'done':
+        print("\nquick_check: not completed within the time budget")
+    elif report['problems']:
+        print(f"\nquick_check found {len(report['problems'])} problem(s):")
+        for problem in report['problems']:
+            print(f"  {problem}")
+    else:
+        print("\nquick_check: ok")
+
+    before, after = report['size_before'], report['size_after']
+    print(f"\nSize: {before['bytes'] / 1024:,.0f} KiB -> {after['bytes'] / 1024:,.0f} KiB "
+          f"(free pages {before['free_pages']:,} -> {after['free_pages']:,})")
+
+    print(f"\n{'Query':<22} {'Before ms':>10} {'After ms':>10}  Plan")
+    print("-" * 78)
+    for name, (plan, elapsed) in plans_after.items():
+        old_plan, old_elapsed = plans_before[name]
+        print(f"{name:<22} {old_elapsed:>10.2f} {elapsed:>10.2f}  {plan}")
+        if plan != old_plan:
+            print(f"{'':<45}  (was: {old_plan})")
+
+
+if __name__ == "__main__":
+    main()
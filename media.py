@@ -0,0 +1,183 @@
+import base64
+import os
+import queue
+import threading
+from collections import OrderedDict
+from tkinter import PhotoImage, TclError
+
+
+MEDIA_KINDS = ('image', 'audio')
+
+
+def add_media(conn, card_id, kind, path):
+    """Attach an image or audio file to a card (no-op if already attached).
+
+    Only the reference is stored; the file is read when the card comes up.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        card_id (int): Card the file belongs to
+        kind (str): 'image' or 'audio'
+        path (str): File path, relative to the media directory or absolute
+    """
+    if kind not in MEDIA_KINDS:
+        raise ValueError(f"Unknown media kind: {kind}")
+    conn.execute('INSERT OR IGNORE INTO media (card_id, kind, path) VALUES (?, ?, ?)',
+                 (card_id, kind, path))
+
+
+def get_card_media(conn, card_ids):
+    """Look up the media attached to some cards.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        card_ids (list): Card ids to look up
+
+    Returns:
+        dict: card_id -> {kind: path}, with the first file of each kind;
+            cards without media are left out
+    """
+    media = {}
+    card_ids = list(card_ids)
+    if not card_ids:
+        return media
+    placeholders = ', '.join('?' * len(card_ids))
+    for card_id, kind, path in conn.execute(
+            f'SELECT card_id, kind, path FROM media WHERE card_id IN ({placeholders}) ORDER BY id',
+            card_ids):
+        media.setdefault(card_id, {}).setdefault(kind, path)
+    return media
+
+
+class MediaCache:
+    """Size-bounded LRU cache of card images, filled ahead of time.
+
+    prefetch() hands image paths to a background thread that reads the
+    files, so card transitions never wait on disk. Tk images can only be
+    created on the Tk thread, so the file data is turned into PhotoImages
+    by a short after() poll, a few at a time. Images larger than MAX_SIZE
+    are shrunk, and the least recently used images are dropped once their
+    decoded size exceeds the capacity.
+    """
+
+    CAPACITY_BYTES = 32 * 2 ** 20  # Decoded size kept in memory (4 bytes per pixel)
+    MAX_SIZE = (360, 180)  # Largest image shown on a card, in pixels
+    POLL_INTERVAL = 50  # ms between checks for files read in the background
+    DECODE_PER_POLL = 2  # Images turned into PhotoImages per poll
+
+    def __init__(self, master, media_dir="media", capacity_bytes=None):
+        """Initialize the cache and start the reader thread.
+
+        Args:
+            master: Tk widget that owns the images
+            media_dir (str): Directory relative media paths are resolved against
+            capacity_bytes (int): Decoded size at which images are evicted
+        """
+        self.master = master
+        self.media_dir = media_dir
+        self.capacity_bytes = capacity_bytes or self.CAPACITY_BYTES
+        self._images = OrderedDict()  # path -> PhotoImage
+        self._sizes = {}  # path -> decoded bytes
+        self._total = 0
+        self._pending = set()  # Paths queued or read but not decoded yet
+        self._requests = queue.Queue()
+        self._ready = queue.Queue()  # (path, base64 data or None)
+        self._poll_id = None
+        self._thread = threading.Thread(target=self._read_files, name="media-reader", daemon=True)
+        self._thread.start()
+
+    def _resolve(self, path):
+        return os.path.join(self.media_dir, path)
+
+    def _read(self, path):
+        """File contents as base64 for PhotoImage(data=...), or None if unreadable."""
+        try:
+            with open(self._resolve(path), 'rb') as file:
+                return base64.b64encode(file.read())
+        except OSError as e:
+            print(f"Could not read media file {path}: {e}")
+            return None
+
+    def _read_files(self):
+        while True:
+            path = self._requests.get()
+            if path is None:
+                break
+            self._ready.put((path, self._read(path)))
+
+    def _decode(self, path, data):
+        """Create the PhotoImage for file data and add it to the cache."""
+        if data is None:
+            return None
+        try:
+            image = PhotoImage(master=self.master, data=data)
+        except TclError as e:
+            print(f"Could not decode media file {path}: {e}")
+            return None
+        factor = max(-(-image.width() // self.MAX_SIZE[0]), -(-image.height() // self.MAX_SIZE[1]))
+        if factor > 1:
+            image = image.subsample(factor)
+        self._images[path] = image
+        self._sizes[path] = image.width() * image.height() * 4
+        self._total += self._sizes[path]
+        self._evict()
+        return image
+
+    def _evict(self):
+        while self._total > self.capacity_bytes and len(self._images) > 1:
+            path, _ = self._images.popitem(last=False)
+            self._total -= self._sizes.pop(path)
+
+    def _poll(self):
+        self._poll_id = None
+        for _ in range(self.DECODE_PER_POLL):
+            try:
+                path, data = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            if path in self._pending:
+                self._pending.discard(path)
+                self._decode(path, data)
+        if self._pending:
+            self._poll_id = self.master.after(self.POLL_INTERVAL, self._poll)
+
+    def prefetch(self, paths):
+        """Start loading images that will be needed soon."""
+        for path in paths:
+            if path and path not in self._images and path not in self._pending:
+                self._pending.add(path)
+                self._requests.put(path)
+        if self._pending and self._poll_id is None:
+            self._poll_id = self.master.after(self.POLL_INTERVAL, self._poll)
+
+    def get(self, path):
+        """Return the PhotoImage for an image path, loading it now if it was not prefetched.
+
+        Returns:
+            PhotoImage: The image, or None if the file is missing or not an image
+        """
+        image = self._images.get(path)
+        if image is not None:
+            self._images.move_to_end(path)
+            return image
+        # Not ready yet; a background read still in flight is ignored when it arrives
+        self._pending.discard(path)
+        return self._decode(path, self._read(path))
+
+    def __contains__(self, path):
+        return path in self._images
+
+    def close(self):
+        """Stop the reader thread and drop the cached images."""
+        if self._poll_id is not None:
+            try:
+                self.master.after_cancel(self._poll_id)
+            except TclError:
+                pass  # The window is already gone
+            self._poll_id = None
+        self._requests.put(None)
+        self._thread.join()
+        self._images.clear()
+        self._sizes.clear()
+        self._total = 0
+        self._pending.clear()
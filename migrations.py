@@ -0,0 +1,777 @@
+import csv
+import os
+import sqlite3
+import sys
+import time
+from deck_stats import create_deck_stats_triggers, rebuild_deck_stats
+from terms import content_hash
+
+
+# Registered migrations as (version, description, steps), in version order
+MIGRATIONS = []
+
+# Rows updated per transaction by backfill steps
+DEFAULT_BATCH_SIZE = 10000
+
+# Deck CSV files that cards imported before schema version 2 came from
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def migration(version, description):
+    """
+    Register a migration.
+
+    The decorated function returns a list of (name, step) pairs. Each step
+    is called as step(conn, progress). Schema steps run in a transaction
+    together with the version bump; backfill steps commit in batches and
+    must be safe to run again, so an interrupted migration can resume.
+
+    Parameters:
+    version (int): Schema version the migration upgrades to
+    description (str): Short description shown while migrating
+    """
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return func
+    return register
+
+
+def get_schema_version(conn):
+    """
+    Get the schema version stored in PRAGMA user_version.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    int: Current schema version (0 for a new or pre-migration database)
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def get_columns(conn, table):
+    """
+    Get the column names of a table.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    table (str): Table name
+
+    Returns:
+    set: Column names
+    """
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def schema_step(*statements):
+    """
+    Build a step that runs DDL statements.
+
+    Parameters:
+    *statements (str): SQL statements to execute in order
+
+    Returns:
+    callable: Migration step
+    """
+    def step(conn, progress):
+        for statement in statements:
+            conn.execute(statement)
+    return step
+
+
+def add_column_step(table, column, definition):
+    """
+    Build a step that adds a column unless it already exists.
+
+    Parameters:
+    table (str): Table name
+    column (str): Column name
+    definition (str): Column type and constraints
+
+    Returns:
+    callable: Migration step
+    """
+    def step(conn, progress):
+        if column not in get_columns(conn, table):
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return step
+
+
+def backfill_step(table, set_sql, where_sql, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Build a step that updates rows in rowid ranges, committing each batch.
+
+    Short transactions keep the write lock free for other connections and
+    stop the WAL from growing with the size of the table. The where_sql
+    condition should exclude rows that are already done, so the step can
+    be rerun after an interruption.
+
+    Parameters:
+    table (str): Table name
+    set_sql (str): SET clause, without the SET keyword
+    where_sql (str): Condition selecting the rows still to update
+    params (tuple): Parameters for set_sql and where_sql
+    batch_size (int): Rowid range covered by each transaction
+
+    Returns:
+    callable: Migration step
+    """
+    def step(conn, progress):
+        low, high = conn.execute(f'SELECT MIN(rowid), MAX(rowid) FROM {table}').fetchone()
+        if low is None:
+            return
+
+        updated = 0
+        total = high - low + 1
+        for start in range(low, high + 1, batch_size):
+            cursor = conn.execute(
+                f'UPDATE {table} SET {set_sql} WHERE ({where_sql}) AND rowid >= ? AND rowid < ?',
+                tuple(params) + (start, start + batch_size)
+            )
+            conn.commit()
+            updated += cursor.rowcount
+            done = min(start + batch_size, high + 1) - low
+            progress(f"    {done:,}/{total:,} rows scanned, {updated:,} updated")
+    step.batched = True
+    return step
+
+
+def copy_step(table, *statements, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Build a step that runs INSERT ... SELECT statements over rowid ranges of
+    a table, committing each batch.
+
+    Each statement reads from the table and takes the start (inclusive) and
+    end (exclusive) of the rowid range as its two parameters. Like
+    backfill_step, it must skip rows that are already copied (e.g. with
+    INSERT OR IGNORE) so the step can be rerun after an interruption.
+
+    Parameters:
+    table (str): Table the statements read from
+    *statements (str): INSERT ... SELECT statements with rowid range parameters
+    batch_size (int): Rowid range covered by each transaction
+
+    Returns:
+    callable: Migration step
+    """
+    def step(conn, progress):
+        low, high = conn.execute(f'SELECT MIN(rowid), MAX(rowid) FROM {table}').fetchone()
+        if low is None:
+            return
+
+        inserted = 0
+        total = high - low + 1
+        for start in range(low, high + 1, batch_size):
+            for statement in statements:
+                inserted += conn.execute(statement, (start, start + batch_size)).rowcount
+            conn.commit()
+            done = min(start + batch_size, high + 1) - low
+            progress(f"    {done:,}/{total:,} rows scanned, {inserted:,} inserted")
+    step.batched = True
+    return step
+
+
+def _incremental_auto_vacuum(conn, progress):
+    """
+    Ask for auto_vacuum=INCREMENTAL.
+
+    New databases already have it (migrate sets it before the first table is
+    created). Existing files only switch after a full VACUUM, which would
+    stall startup here, so it is left to maintenance.py --full-vacuum.
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    progress("    run 'python maintenance.py --full-vacuum' once to apply it to this file")
+
+
+def migrate(conn, target=None, progress=print):
+    """
+    Upgrade the database schema to the latest (or target) version.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    target (int): Version to stop at (latest if None)
+    progress (callable): Called with progress messages
+
+    Returns:
+    int: Schema version after migrating
+    """
+    current = get_schema_version(conn)
+    # auto_vacuum can only be chosen before the first table is created, and
+    # only takes effect after a VACUUM once the file has a header (e.g. after
+    # journal_mode=WAL); vacuuming an empty file is instant
+    if current == 0 and not conn.execute('SELECT 1 FROM sqlite_master').fetchone():
+        conn.commit()
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+
+    for version, description, func in MIGRATIONS:
+        if version <= current:
+            continue
+        if target is not None and version > target:
+            break
+
+        progress(f"Migrating to version {version}: {description}")
+        steps = func()
+        started = time.perf_counter()
+        try:
+            conn.commit()
+            for index, (name, step) in enumerate(steps, 1):
+                step_started = time.perf_counter()
+                if not getattr(step, 'batched', False) and not conn.in_transaction:
+                    conn.execute('BEGIN')
+                step(conn, progress)
+                progress(f"  [{index}/{len(steps)}] {name} "
+                         f"({time.perf_counter() - step_started:.2f}s)")
+
+            if not conn.in_transaction:
+                conn.execute('BEGIN')
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+        current = version
+        progress(f"Version {version} done in {time.perf_counter() - started:.2f}s")
+
+    return current
+
+
+@migration(1, "flashcards table")
+def _create_flashcards():
+    return [
+        ("create flashcards table", schema_step('''
+        CREATE TABLE IF NOT EXISTS flashcards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target_word TEXT NOT NULL,          -- Word in the language being learned
+            native_word TEXT NOT NULL,          -- Translation in native language
+            last_displayed TIMESTAMP,           -- Last time the card was shown
+            last_correct TIMESTAMP,             -- Last time user answered correctly
+            correct_count INTEGER DEFAULT 0,    -- Number of times answered correctly
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')),
+        ("create indexes", schema_step(
+            'CREATE INDEX IF NOT EXISTS idx_target ON flashcards(target_word)',
+            'CREATE INDEX IF NOT EXISTS idx_last_displayed ON flashcards(last_displayed)'
+        )),
+    ]
+
+
+def _load_deck_pairs(conn, progress):
+    """Collect the (target, native) pairs of every data/ CSV file and the sample cards, with their decks."""
+    from load_db import SAMPLE_CARDS, SAMPLE_DECK, deck_name_for_file, get_all_csv_files, read_csv_rows
+
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS deck_pairs (
+            target_word TEXT NOT NULL,
+            native_word TEXT NOT NULL,
+            deck TEXT NOT NULL,
+            PRIMARY KEY (target_word, native_word)
+        )
+    ''')
+    if not conn.execute('SELECT 1 FROM flashcards LIMIT 1').fetchone():
+        return
+    # A pair found in several files goes to the first file's deck
+    for csv_file_path in sorted(get_all_csv_files(DATA_DIR)):
+        deck = deck_name_for_file(csv_file_path)
+        try:
+            conn.executemany(
+                'INSERT OR IGNORE INTO temp.deck_pairs (target_word, native_word, deck) VALUES (?, ?, ?)',
+                ((row[0].strip(), row[1].strip(), deck) for row in read_csv_rows(csv_file_path)))
+        except (OSError, ValueError, csv.Error) as e:
+            progress(f"    skipped {os.path.basename(csv_file_path)}: {e}")
+    conn.executemany('INSERT OR IGNORE INTO temp.deck_pairs (target_word, native_word, deck) VALUES (?, ?, ?)',
+                     [pair + (SAMPLE_DECK,) for pair in SAMPLE_CARDS])
+    pairs = conn.execute('SELECT COUNT(*) FROM temp.deck_pairs').fetchone()[0]
+    progress(f"    {pairs:,} pairs in {DATA_DIR}")
+
+
+_DECK_PAIR = '''
+FROM temp.deck_pairs p
+WHERE p.target_word = flashcards.target_word AND p.native_word = flashcards.native_word
+'''
+
+
+@migration(2, "deck and due date scheduling")
+def _add_deck_and_due_date():
+    return [
+        ("add deck column", add_column_step('flashcards', 'deck', 'TEXT')),
+        # Cards imported before decks existed belong to the data file they came from
+        ("read deck files", _load_deck_pairs),
+        ("assign existing cards to decks", backfill_step(
+            'flashcards',
+            f'deck = (SELECT p.deck {_DECK_PAIR})',
+            f'deck IS NULL AND EXISTS (SELECT 1 {_DECK_PAIR})'
+        )),
+        ("drop deck file pairs", schema_step('DROP TABLE IF EXISTS temp.deck_pairs')),
+        ("add due_date column", add_column_step('flashcards', 'due_date', 'TIMESTAMP')),
+        # Existing cards keep the 7-day multiplier schedule they had before
+        ("backfill due_date", backfill_step(
+            'flashcards',
+            "due_date = datetime(last_correct, '+' || (correct_count * 7) || ' days')",
+            'due_date IS NULL AND last_correct IS NOT NULL'
+        )),
+        ("create deck/due_date index", schema_step(
+            'CREATE INDEX IF NOT EXISTS idx_deck_due ON flashcards(deck, due_date)'
+        )),
+    ]
+
+
+@migration(3, "review log")
+def _create_reviews():
+    return [
+        ("create reviews table", schema_step('''
+        CREATE TABLE IF NOT EXISTS reviews (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            card_id INTEGER NOT NULL REFERENCES flashcards(id),
+            reviewed_at TIMESTAMP NOT NULL,     -- When the answer was given
+            correct INTEGER NOT NULL,           -- 1 if marked known, 0 otherwise
+            latency_ms INTEGER                  -- Time from showing the card to the answer
+        )
+        ''')),
+        ("create reviews index", schema_step(
+            'CREATE INDEX IF NOT EXISTS idx_reviews_card ON reviews(card_id, reviewed_at)'
+        )),
+    ]
+
+
+def _content_hash_step(step):
+    """Wrap a step so SQL in it can call content_hash(target, native)."""
+    def wrapped(conn, progress):
+        conn.create_function('content_hash', 2, content_hash, deterministic=True)
+        step(conn, progress)
+    wrapped.batched = getattr(step, 'batched', False)
+    return wrapped
+
+
+@migration(4, "interned terms and content hashes")
+def _add_terms():
+    return [
+        ("create terms table", schema_step('''
+        CREATE TABLE IF NOT EXISTS terms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL UNIQUE
+        )
+        ''')),
+        ("add target_term_id column", add_column_step('flashcards', 'target_term_id', 'INTEGER REFERENCES terms(id)')),
+        ("add native_term_id column", add_column_step('flashcards', 'native_term_id', 'INTEGER REFERENCES terms(id)')),
+        ("add content_hash column", add_column_step('flashcards', 'content_hash', 'INTEGER')),
+        ("intern existing words", copy_step(
+            'flashcards',
+            'INSERT OR IGNORE INTO terms (text) SELECT target_word FROM flashcards WHERE rowid >= ? AND rowid < ?',
+            'INSERT OR IGNORE INTO terms (text) SELECT native_word FROM flashcards WHERE rowid >= ? AND rowid < ?'
+        )),
+        ("backfill term ids", backfill_step(
+            'flashcards',
+            'target_term_id = (SELECT id FROM terms WHERE text = target_word), '
+            'native_term_id = (SELECT id FROM terms WHERE text = native_word)',
+            'target_term_id IS NULL OR native_term_id IS NULL'
+        )),
+        ("backfill content hashes", _content_hash_step(backfill_step(
+            'flashcards',
+            'content_hash = content_hash(target_word, native_word)',
+            'content_hash IS NULL'
+        ))),
+        # Duplicate checks use an in-memory hash set, so content_hash needs no index
+        ("create term index", schema_step(
+            'CREATE INDEX IF NOT EXISTS idx_target_term ON flashcards(target_term_id)'
+        )),
+    ]
+
+
+@migration(5, "review directions")
+def _add_card_directions():
+    return [
+        # Forward scheduling stays on flashcards; other directions keep only
+        # their scheduling state here and share the card's content
+        ("create card_directions table", schema_step('''
+        CREATE TABLE IF NOT EXISTS card_directions (
+            card_id INTEGER NOT NULL REFERENCES flashcards(id),
+            direction TEXT NOT NULL,            -- e.g. 'reverse' (native word shown first)
+            last_displayed TIMESTAMP,
+            last_correct TIMESTAMP,
+            correct_count INTEGER DEFAULT 0,
+            due_date TIMESTAMP,
+            PRIMARY KEY (card_id, direction)
+        ) WITHOUT ROWID
+        ''')),
+        ("create card_directions due index", schema_step(
+            'CREATE INDEX IF NOT EXISTS idx_directions_due ON card_directions(due_date)'
+        )),
+        ("add reviews.direction column", add_column_step('reviews', 'direction', "TEXT DEFAULT 'forward'")),
+    ]
+
+
+@migration(6, "deck statistics counters")
+def _add_deck_stats():
+    return [
+        ("create deck_stats tables", schema_step('''
+        CREATE TABLE IF NOT EXISTS deck_stats (
+            deck TEXT PRIMARY KEY,              -- '' for cards without a deck
+            cards INTEGER NOT NULL DEFAULT 0,
+            reviews INTEGER NOT NULL DEFAULT 0,
+            correct_reviews INTEGER NOT NULL DEFAULT 0,
+            last_review_day TEXT,               -- Local date of the latest review
+            streak_days INTEGER NOT NULL DEFAULT 0
+        )
+        ''', '''
+        CREATE TABLE IF NOT EXISTS deck_bucket_stats (
+            deck TEXT NOT NULL,
+            bucket INTEGER NOT NULL,            -- MIN(correct_count, deck_stats.MAX_BUCKET)
+            cards INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (deck, bucket)
+        ) WITHOUT ROWID
+        ''')),
+        ("create triggers", lambda conn, progress: create_deck_stats_triggers(conn)),
+        ("count existing cards and reviews", lambda conn, progress: rebuild_deck_stats(conn)),
+    ]
+
+
+@migration(7, "flashcard set configuration")
+def _add_flashcard_sets():
+    return [
+        ("create flashcard_sets table", schema_step('''
+        CREATE TABLE IF NOT EXISTS flashcard_sets (
+            id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,          -- Order in the launcher's list
+            name TEXT NOT NULL,
+            data_file TEXT NOT NULL,
+            front_lang TEXT NOT NULL,
+            back_lang TEXT NOT NULL,
+            options TEXT NOT NULL DEFAULT '{}', -- JSON object with any other settings
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')),
+    ]
+
+
+@migration(8, "card media")
+def _add_media():
+    return [
+        ("create media table", schema_step('''
+        CREATE TABLE IF NOT EXISTS media (
+            id INTEGER PRIMARY KEY,
+            card_id INTEGER NOT NULL REFERENCES flashcards (id),
+            kind TEXT NOT NULL,                 -- 'image' or 'audio'
+            path TEXT NOT NULL,                 -- Relative to the media directory, or absolute
+            UNIQUE (card_id, kind, path)
+        )
+        ''')),
+    ]
+
+
+@migration(9, "incremental vacuum and maintenance log")
+def _add_maintenance():
+    return [
+        ("create maintenance_runs table", schema_step('''
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            id INTEGER PRIMARY KEY,
+            started_at TIMESTAMP NOT NULL,
+            seconds REAL NOT NULL,
+            problems INTEGER NOT NULL,          -- Rows reported by PRAGMA quick_check
+            freed_pages INTEGER NOT NULL,
+            size_before INTEGER NOT NULL,       -- Bytes
+            size_after INTEGER NOT NULL,
+            completed INTEGER NOT NULL          -- 0 if the time budget ran out
+        )
+        ''')),
+        ("enable incremental auto_vacuum", _incremental_auto_vacuum),
+    ]
+
+
+# Every write to a card's scheduling state or content bumps the logical
+# clock and stamps the card direction with it, so sync can find what
+# changed since any clock value through idx_card_changes_version.
+SYNC_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_sync_card_insert AFTER INSERT ON flashcards
+    BEGIN
+        UPDATE sync_state SET clock = clock + 1;
+        INSERT INTO card_changes (card_id, direction, version)
+            VALUES (NEW.id, 'forward', (SELECT clock FROM sync_state))
+            ON CONFLICT (card_id, direction) DO UPDATE SET version = excluded.version;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_sync_card_update
+    AFTER UPDATE OF target_term_id, native_term_id, deck, last_displayed, last_correct, correct_count, due_date
+    ON flashcards
+    BEGIN
+        UPDATE sync_state SET clock = clock + 1;
+        INSERT INTO card_changes (card_id, direction, version)
+            VALUES (NEW.id, 'forward', (SELECT clock FROM sync_state))
+            ON CONFLICT (card_id, direction) DO UPDATE SET version = excluded.version;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_sync_direction_insert AFTER INSERT ON card_directions
+    BEGIN
+        UPDATE sync_state SET clock = clock + 1;
+        INSERT INTO card_changes (card_id, direction, version)
+            VALUES (NEW.card_id, NEW.direction, (SELECT clock FROM sync_state))
+            ON CONFLICT (card_id, direction) DO UPDATE SET version = excluded.version;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_sync_direction_update AFTER UPDATE ON card_directions
+    BEGIN
+        UPDATE sync_state SET clock = clock + 1;
+        INSERT INTO card_changes (card_id, direction, version)
+            VALUES (NEW.card_id, NEW.direction, (SELECT clock FROM sync_state))
+            ON CONFLICT (card_id, direction) DO UPDATE SET version = excluded.version;
+    END
+    ''',
+]
+
+
+@migration(10, "sync change log")
+def _add_sync():
+    return [
+        ("create sync tables", schema_step('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            replica_id TEXT NOT NULL,           -- Identifies this copy of the database
+            clock INTEGER NOT NULL              -- Logical clock, bumped on every change
+        )
+        ''', '''
+        INSERT INTO sync_state (replica_id, clock)
+        SELECT lower(hex(randomblob(16))), 1 WHERE NOT EXISTS (SELECT 1 FROM sync_state)
+        ''', '''
+        CREATE TABLE IF NOT EXISTS card_changes (
+            card_id INTEGER NOT NULL,
+            direction TEXT NOT NULL,
+            version INTEGER NOT NULL,           -- sync_state.clock at the latest change
+            PRIMARY KEY (card_id, direction)
+        ) WITHOUT ROWID
+        ''', '''
+        CREATE INDEX IF NOT EXISTS idx_card_changes_version ON card_changes (version)
+        ''', '''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            peer_id TEXT PRIMARY KEY,
+            received_version INTEGER NOT NULL DEFAULT 0,  -- Peer's clock at the last batch applied here
+            acked_version INTEGER NOT NULL DEFAULT 0,     -- Our clock the peer has confirmed applying
+            last_sync TIMESTAMP
+        )
+        ''')),
+        # Existing cards count as changed at clock 1, so a first sync sends everything
+        ("log existing cards", schema_step('''
+        INSERT OR IGNORE INTO card_changes (card_id, direction, version)
+        SELECT id, 'forward', 1 FROM flashcards
+        ''', '''
+        INSERT OR IGNORE INTO card_changes (card_id, direction, version)
+        SELECT card_id, direction, 1 FROM card_directions
+        ''')),
+        ("create sync triggers", schema_step(*SYNC_TRIGGERS)),
+        ("backfill content hashes", _content_hash_step(backfill_step(
+            'flashcards',
+            'content_hash = content_hash(target_word, native_word)',
+            'content_hash IS NULL'
+        ))),
+        # Sync matches cards across copies by content hash
+        ("create content hash index", schema_step(
+            'CREATE INDEX IF NOT EXISTS idx_content_hash ON flashcards (content_hash)'
+        )),
+    ]
+
+
+@migration(11, "imported deck files")
+def _add_deck_files():
+    return [
+        ("create deck_files table", schema_step('''
+        CREATE TABLE IF NOT EXISTS deck_files (
+            path TEXT PRIMARY KEY,              -- Absolute path of the CSV file
+            mtime_ns INTEGER NOT NULL,          -- File modification time when last imported
+            size INTEGER NOT NULL,
+            imported_at TIMESTAMP NOT NULL
+        )
+        ''')),
+    ]
+
+
+# Same columns, in the same order, as flashcards had before version 12,
+# with the words read from terms
+FLASHCARDS_WITH_TEXT_VIEW = '''
+CREATE VIEW IF NOT EXISTS flashcards_with_text AS
+SELECT f.id, t.text AS target_word, n.text AS native_word, f.last_displayed, f.last_correct,
+       f.correct_count, datetime(f.created_at, 'unixepoch') AS created_at, f.deck, f.due_date,
+       f.target_term_id, f.native_term_id, f.content_hash
+FROM flashcards f
+JOIN terms t ON t.id = f.target_term_id
+JOIN terms n ON n.id = f.native_term_id
+'''
+
+
+# Columns copied from flashcards into the rebuilt table, and how each old value is read.
+# created_at becomes Unix seconds: 4-6 bytes per card instead of 19 characters of text.
+_CARD_COPY_COLUMNS = [
+    ('id', '{row}id'),
+    ('target_term_id', '{row}target_term_id'),
+    ('native_term_id', '{row}native_term_id'),
+    ('deck', '{row}deck'),
+    ('last_displayed', '{row}last_displayed'),
+    ('last_correct', '{row}last_correct'),
+    ('correct_count', '{row}correct_count'),
+    ('due_date', '{row}due_date'),
+    ('content_hash', '{row}content_hash'),
+    ('created_at', "CAST(strftime('%s', {row}created_at) AS INTEGER)"),
+]
+
+
+def _card_copy_sql(row=''):
+    """
+    Build the column list and value expressions for copying cards into flashcards_new.
+
+    Parameters:
+    row (str): Prefix for the old table's columns, e.g. 'NEW.' inside a trigger
+
+    Returns:
+    tuple: (column list, value expressions) as SQL fragments
+    """
+    columns = ', '.join(column for column, _ in _CARD_COPY_COLUMNS)
+    values = ', '.join(value.format(row=row) for _, value in _CARD_COPY_COLUMNS)
+    return columns, values
+
+
+def _create_flashcards_new():
+    """
+    Build the statements that create flashcards_new and keep it in step
+    with writes to flashcards while the cards are copied in batches.
+
+    Returns:
+    list: SQL statements
+    """
+    columns, values = _card_copy_sql('NEW.')
+    return [
+        '''
+        CREATE TABLE IF NOT EXISTS flashcards_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target_term_id INTEGER NOT NULL REFERENCES terms(id),   -- Word in the language being learned
+            native_term_id INTEGER NOT NULL REFERENCES terms(id),   -- Translation in native language
+            deck TEXT,
+            last_displayed TIMESTAMP,           -- Last time the card was shown
+            last_correct TIMESTAMP,             -- Last time user answered correctly
+            correct_count INTEGER DEFAULT 0,    -- Number of times answered correctly
+            due_date TIMESTAMP,
+            content_hash INTEGER,               -- Hash of the normalized (target, native) pair
+            created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))     -- Unix seconds
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_flashcards_copy_insert AFTER INSERT ON flashcards
+        BEGIN
+            INSERT OR REPLACE INTO flashcards_new ({columns}) VALUES ({values});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_flashcards_copy_update AFTER UPDATE ON flashcards
+        BEGIN
+            DELETE FROM flashcards_new WHERE id = OLD.id;
+            INSERT OR REPLACE INTO flashcards_new ({columns}) VALUES ({values});
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_flashcards_copy_delete AFTER DELETE ON flashcards
+        BEGIN
+            DELETE FROM flashcards_new WHERE id = OLD.id;
+        END
+        ''',
+    ]
+
+
+def _copy_cards_step():
+    """Build the batched copy of flashcards into flashcards_new; rows already there are kept."""
+    columns, values = _card_copy_sql()
+    return copy_step(
+        'flashcards',
+        f'INSERT OR IGNORE INTO flashcards_new ({columns}) '
+        f'SELECT {values} FROM flashcards WHERE rowid >= ? AND rowid < ?'
+    )
+
+
+# Swap the copy in for flashcards, keeping the id sequence so deleted ids are not reused
+_REPLACE_FLASHCARDS = [
+    'DROP TRIGGER IF EXISTS trg_flashcards_copy_insert',
+    'DROP TRIGGER IF EXISTS trg_flashcards_copy_update',
+    'DROP TRIGGER IF EXISTS trg_flashcards_copy_delete',
+    "DELETE FROM sqlite_sequence WHERE name = 'flashcards_new'",
+    '''
+    INSERT INTO sqlite_sequence (name, seq)
+    SELECT 'flashcards_new', MAX(seq) FROM sqlite_sequence WHERE name = 'flashcards'
+    ''',
+    # Triggers on other tables that read flashcards would block the rename
+    'DROP TRIGGER IF EXISTS trg_deck_stats_review',
+    'DROP TABLE flashcards',
+    'ALTER TABLE flashcards_new RENAME TO flashcards',
+]
+
+
+@migration(12, "cards reference terms")
+def _drop_card_text():
+    return [
+        # Cards added after version 4 by older code may lack term ids or hashes
+        ("intern missing words", copy_step(
+            'flashcards',
+            'INSERT OR IGNORE INTO terms (text) SELECT target_word FROM flashcards '
+            'WHERE target_term_id IS NULL AND rowid >= ? AND rowid < ?',
+            'INSERT OR IGNORE INTO terms (text) SELECT native_word FROM flashcards '
+            'WHERE native_term_id IS NULL AND rowid >= ? AND rowid < ?'
+        )),
+        ("backfill term ids", backfill_step(
+            'flashcards',
+            'target_term_id = (SELECT id FROM terms WHERE text = target_word), '
+            'native_term_id = (SELECT id FROM terms WHERE text = native_word)',
+            'target_term_id IS NULL OR native_term_id IS NULL'
+        )),
+        ("backfill content hashes", _content_hash_step(backfill_step(
+            'flashcards',
+            'content_hash = content_hash(target_word, native_word)',
+            'content_hash IS NULL'
+        ))),
+        ("create flashcards_new", schema_step(*_create_flashcards_new())),
+        ("copy cards", _copy_cards_step()),
+        ("replace flashcards", schema_step(*_REPLACE_FLASHCARDS)),
+        # idx_target_term and idx_last_displayed are left out: no query looks
+        # cards up by term or by last_displayed
+        ("recreate indexes", schema_step(
+            'CREATE INDEX IF NOT EXISTS idx_deck_due ON flashcards(deck, due_date)',
+            'CREATE INDEX IF NOT EXISTS idx_content_hash ON flashcards(content_hash)'
+        )),
+        ("recreate triggers", lambda conn, progress: create_deck_stats_triggers(conn)),
+        ("recreate sync triggers", schema_step(*SYNC_TRIGGERS)),
+        ("create flashcards_with_text view", schema_step(FLASHCARDS_WITH_TEXT_VIEW)),
+    ]
+
+
+@migration(13, "review days for streaks")
+def _add_deck_review_days():
+    return [
+        ("create deck_review_days table", schema_step('''
+        CREATE TABLE IF NOT EXISTS deck_review_days (
+            deck TEXT NOT NULL,                 -- '' for cards without a deck
+            day TEXT NOT NULL,                  -- Local date with at least one review
+            PRIMARY KEY (deck, day)
+        ) WITHOUT ROWID
+        ''')),
+        # Earlier versions assumed reviews arrive in reviewed_at order
+        ("replace review trigger", schema_step('DROP TRIGGER IF EXISTS trg_deck_stats_review')),
+        ("create triggers", lambda conn, progress: create_deck_stats_triggers(conn)),
+        ("recount review days and streaks", lambda conn, progress: rebuild_deck_stats(conn)),
+    ]
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'flashcards.db'
+    conn = sqlite3.connect(db_path)
+    try:
+        print(f"{db_path}: schema version {get_schema_version(conn)}")
+        version = migrate(conn)
+        print(f"{db_path}: schema version {version} (latest)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
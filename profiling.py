@@ -0,0 +1,195 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tkinter
+import traceback
+from collections import defaultdict
+
+
+PROFILE_ENV = "FLASHCARD_PROFILE"  # Set to 1 to profile without changing code
+
+
+def profiling_requested():
+    """Whether profiling was turned on through the FLASHCARD_PROFILE environment variable."""
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def _handler_name(func):
+    """Readable name for a Tk callback."""
+    name = getattr(func, "__qualname__", None) or repr(func)
+    code = getattr(func, "__code__", None)
+    if code is not None:
+        name += f" ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name
+
+
+class EventLoopProfiler:
+    """Times every Tk callback while a main loop runs.
+
+    While active, every after() callback, button command, binding and
+    window protocol handler is wrapped with a timer. A watchdog thread
+    samples the main thread's stack whenever a callback has blocked the
+    event loop for longer than the threshold. On stop, a cProfile/pstats
+    file and a summary of the slowest handlers are written.
+
+    Only one profiler can be active at a time; starting a second one (for
+    example a FlashcardApp run from a profiled launcher) does nothing.
+    """
+
+    THRESHOLD_MS = 50  # Callbacks slower than this are reported with their stack
+    TOP_HANDLERS = 15  # Handlers listed in the summary
+
+    _active = None
+
+    def __init__(self, name, threshold_ms=None, output_dir="."):
+        """Initialize the profiler.
+
+        Args:
+            name (str): Base name of the output files
+            threshold_ms (int): Callback duration that counts as blocking
+            output_dir (str): Directory the output files are written to
+        """
+        self.name = name
+        self.threshold = (threshold_ms or self.THRESHOLD_MS) / 1000
+        self.stats_path = os.path.join(output_dir, f"{name}.pstats")
+        self.summary_path = os.path.join(output_dir, f"{name}_summary.txt")
+        self.handlers = defaultdict(lambda: [0, 0.0, 0.0])  # name -> [calls, total s, max s]
+        self.slow_calls = []  # (name, seconds, stack)
+        self._profile = cProfile.Profile()
+        self._running = None  # (name, start) of the callback on the main thread
+        self._sampled_stack = None
+        self._stop_event = threading.Event()
+        self._watchdog = None
+        self._originals = None
+        self._enabled = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _wrap(self, func, name=None):
+        name = name or _handler_name(func)
+
+        def timed(*args, **kwargs):
+            # Nested callbacks (e.g. update() inside a handler) count toward the outer one
+            if self._running is not None:
+                return func(*args, **kwargs)
+            self._sampled_stack = None
+            start = time.perf_counter()
+            self._running = (name, start)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self._running = None
+                self._record(name, elapsed)
+
+        timed.__qualname__ = getattr(func, "__qualname__", "callback")
+        timed._profiled = True
+        return timed
+
+    def _record(self, name, elapsed):
+        stats = self.handlers[name]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+        if elapsed >= self.threshold:
+            stack = self._sampled_stack or "(finished before the watchdog sampled it)\n"
+            self.slow_calls.append((name, elapsed, stack))
+            print(f"Slow callback: {name} blocked the event loop for {elapsed * 1000:.0f} ms")
+
+    def _watch(self, main_thread_id):
+        """Sample the main thread's stack while a callback is over the threshold."""
+        interval = self.threshold / 2
+        while not self._stop_event.wait(interval):
+            running = self._running
+            if running is None or self._sampled_stack is not None:
+                continue
+            if time.perf_counter() - running[1] >= self.threshold:
+                frame = sys._current_frames().get(main_thread_id)
+                if frame is not None:
+                    self._sampled_stack = "".join(traceback.format_stack(frame))
+
+    def start(self):
+        """Start timing callbacks and profiling."""
+        if EventLoopProfiler._active is not None:
+            return
+        EventLoopProfiler._active = self
+        self._enabled = True
+
+        profiler = self
+        original_after = tkinter.Misc.after
+        original_register = tkinter.Misc._register
+        self._originals = (original_after, original_register)
+
+        def after(widget, ms, func=None, *args):
+            if func is not None and not getattr(func, "_profiled", False):
+                func = profiler._wrap(func)
+            return original_after(widget, ms, func, *args)
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            # after() already wrapped its callback; its internal callit needs no timer
+            if not getattr(func, "_profiled", False) and "Misc.after" not in getattr(func, "__qualname__", ""):
+                func = profiler._wrap(func)
+            return original_register(widget, func, subst, needcleanup)
+
+        tkinter.Misc.after = after
+        tkinter.Misc._register = _register
+
+        self._stop_event.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch, args=(threading.get_ident(),), name="profiler-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        self._profile.enable()
+
+    def stop(self):
+        """Stop profiling and write the pstats file and summary."""
+        if not self._enabled:
+            return
+        self._profile.disable()
+        self._stop_event.set()
+        self._watchdog.join()
+        tkinter.Misc.after, tkinter.Misc._register = self._originals
+        EventLoopProfiler._active = None
+        self._enabled = False
+
+        self._profile.dump_stats(self.stats_path)
+        summary = self.summary()
+        with open(self.summary_path, "w") as file:
+            file.write(summary)
+        print(summary)
+        print(f"Profile written to {self.stats_path} (summary in {self.summary_path})")
+
+    def summary(self):
+        """Describe the slowest handlers, the blocking calls and the top functions.
+
+        Returns:
+            str: Summary text
+        """
+        lines = [f"Event loop profile: {self.name}", ""]
+        lines.append(f"{'Handler':<70} {'Calls':>7} {'Total ms':>10} {'Max ms':>9}")
+        lines.append("-" * 99)
+        slowest = sorted(self.handlers.items(), key=lambda item: item[1][2], reverse=True)
+        for name, (calls, total, longest) in slowest[:self.TOP_HANDLERS]:
+            lines.append(f"{name[:70]:<70} {calls:>7} {total * 1000:>10.1f} {longest * 1000:>9.1f}")
+
+        lines += ["", f"{len(self.slow_calls)} callback(s) blocked the event loop for "
+                      f"{self.threshold * 1000:.0f} ms or more"]
+        for name, elapsed, stack in sorted(self.slow_calls, key=lambda call: call[1], reverse=True)[:self.TOP_HANDLERS]:
+            lines += ["", f"{name}: {elapsed * 1000:.0f} ms", stack.rstrip()]
+
+        lines += ["", "Top functions by cumulative time:"]
+        if os.path.exists(self.stats_path):
+            stream = io.StringIO()
+            pstats.Stats(self.stats_path, stream=stream).sort_stats("cumulative").print_stats(self.TOP_HANDLERS)
+            lines.append(stream.getvalue())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
+
+
+def connect_readonly(db_path, check_same_thread=True):
+    """Open a read-only connection for statistics and reports.
+
+    The database is opened with a mode=ro URI, so a report can never take a
+    write lock. With the database in WAL mode (set by create_flashcards_db),
+    readers see a consistent snapshot and never block answer commits.
+
+    Args:
+        db_path (str): Path to the SQLite database
+        check_same_thread (bool): Passed through to sqlite3.connect
+
+    Returns:
+        sqlite3.Connection: Read-only database connection
+    """
+    uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+
+
+class AnalyticsSnapshot:
+    """In-memory copy of the database for heavy analytics.
+
+    The copy is taken with the backup API from a read-only connection and
+    refreshed when it is older than max_age, so repeated reports run
+    against memory without touching the database file at all.
+    """
+
+    MAX_AGE = 300  # Seconds before the copy is refreshed
+
+    def __init__(self, db_path, max_age=None, clock=time.monotonic):
+        """Initialize the snapshot; the first copy is taken on first use.
+
+        Args:
+            db_path (str): Path to the SQLite database
+            max_age (float): Seconds a copy is used before it is refreshed
+            clock (callable): Monotonic clock returning seconds
+        """
+        self.db_path = db_path
+        self.max_age = self.MAX_AGE if max_age is None else max_age
+        self.clock = clock
+        self._conn = None
+        self._taken_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Replace the in-memory copy with a fresh one."""
+        source = connect_readonly(self.db_path)
+        try:
+            copy = sqlite3.connect(':memory:', check_same_thread=False)
+            source.backup(copy)
+        finally:
+            source.close()
+        with self._lock:
+            old, self._conn = self._conn, copy
+            self._taken_at = self.clock()
+        if old is not None:
+            old.close()
+
+    def age(self):
+        """Seconds since the copy was taken, or None if there is no copy yet."""
+        return None if self._taken_at is None else self.clock() - self._taken_at
+
+    def connection(self):
+        """Return a connection to the in-memory copy, refreshing it if stale.
+
+        Returns:
+            sqlite3.Connection: Connection to the copy; do not close it
+        """
+        age = self.age()
+        if age is None or age >= self.max_age:
+            self.refresh()
+        return self._conn
+
+    def close(self):
+        """Drop the in-memory copy."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+            self._taken_at = None
@@ -0,0 +1,248 @@
+import sqlite3
+import sys
+from collections import OrderedDict
+
+from load_db import next_review_state, save_review_states
+
+
+SCHEDULING_FIELDS = ('last_displayed', 'last_correct', 'correct_count', 'due_date')
+
+
+def _cache_key(card):
+    return card['id'], card.get('direction', 'forward')
+
+
+def _displayed(card):
+    # ISO timestamps sort as strings; never-displayed cards sort first
+    return card.get('last_displayed') or ''
+
+
+class SessionCardCache:
+    """In-memory working set of a study session's cards.
+
+    Answers are applied to the cached card immediately and queued for a
+    batched write to SQLite, so marking a card costs no round trips until
+    the batch is flushed. The cache is bounded; the least recently used
+    cards are evicted first. Queued writes hold their own copy of the
+    state, so evicting a card never loses an answer.
+    """
+
+    CAPACITY = 1000  # Cards kept in memory
+    FLUSH_SIZE = 20  # Queued answers that trigger a write
+
+    def __init__(self, capacity=None, flush_size=None):
+        """Initialize the cache.
+
+        Args:
+            capacity (int): Maximum number of cached cards
+            flush_size (int): Number of queued answers at which should_flush() is true
+        """
+        self.capacity = capacity or self.CAPACITY
+        self.flush_size = flush_size or self.FLUSH_SIZE
+        self._cards = OrderedDict()
+        self._pending = OrderedDict()
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __contains__(self, key):
+        return key in self._cards
+
+    def add(self, card):
+        """Cache a card loaded from the database.
+
+        A cached card with queued writes is newer than the database copy,
+        so it is kept.
+
+        Returns:
+            dict: The cached card
+        """
+        key = _cache_key(card)
+        if key in self._pending:
+            return self.get(key)
+        self._cards[key] = card
+        self._cards.move_to_end(key)
+        self._evict()
+        return card
+
+    def add_all(self, cards):
+        """Cache a batch of cards and return their cached versions."""
+        return [self.add(card) for card in cards]
+
+    def get(self, key):
+        """Return the cached card for a (card_id, direction) key, or None."""
+        card = self._cards.get(key)
+        if card is None:
+            card = self._pending.get(key)
+            if card is not None:
+                self._cards[key] = card
+                self._evict()
+        else:
+            self._cards.move_to_end(key)
+        return card
+
+    def record_answer(self, card, correct, days_multiplier=7, interval_picker=None):
+        """Apply an answer to the cached card and queue it for writing.
+
+        Cards evicted since their last answer are not looked up again, so the
+        card passed in must be the one returned by add() or the previous
+        record_answer() call.
+
+        Args:
+            card (dict): Card that was answered
+            correct (bool): Whether the card was marked as known
+            days_multiplier (int): Number of days to wait per correct answer
+            interval_picker (callable): Adjusts the interval, e.g. for load balancing
+
+        Returns:
+            dict: The card with its new scheduling state
+        """
+        key = _cache_key(card)
+        current = self.get(key) or card
+        updated = next_review_state(current, correct, days_multiplier, interval_picker=interval_picker)
+        self._cards[key] = updated
+        self._cards.move_to_end(key)
+        self._pending[key] = updated
+        self._pending.move_to_end(key)
+        self._evict()
+        return updated
+
+    def should_flush(self):
+        """Whether enough answers are queued to be worth writing."""
+        return len(self._pending) >= self.flush_size
+
+    def drain(self):
+        """Return the queued card states and clear the queue."""
+        pending = list(self._pending.values())
+        self._pending.clear()
+        return pending
+
+    def requeue(self, states):
+        """Queue drained card states again after their write failed.
+
+        Cards answered again since the drain keep their newer state, whether
+        it is still queued or already written by a later flush.
+
+        Args:
+            states (list): Card states returned by drain()
+        """
+        for state in states:
+            key = _cache_key(state)
+            if key in self._pending:
+                continue
+            cached = self._cards.get(key)
+            if cached is not None and _displayed(cached) > _displayed(state):
+                continue
+            self._pending[key] = state
+            self._cards[key] = state
+            self._cards.move_to_end(key)
+        self._evict()
+
+    def flush(self, conn):
+        """Write all queued answers to the database in one transaction.
+
+        If the write fails the answers stay queued and the error is raised.
+        """
+        pending = self.drain()
+        if not pending:
+            return
+        try:
+            save_review_states(conn, pending)
+        except sqlite3.Error:
+            self.requeue(pending)
+            raise
+
+    def _evict(self):
+        while len(self._cards) > self.capacity:
+            self._cards.popitem(last=False)
+
+    def verify_against_db(self, conn):
+        """Compare cached cards without queued writes against the database.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+
+        Returns:
+            list: (key, field, cached, stored) tuples for every mismatch
+        """
+        mismatches = []
+        for key, card in self._cards.items():
+            if key in self._pending:
+                continue
+            card_id, direction = key
+            if direction == 'forward':
+                row = conn.execute(
+                    'SELECT last_displayed, last_correct, correct_count, due_date FROM flashcards WHERE id = ?',
+                    (card_id,)).fetchone()
+            else:
+                row = conn.execute('''
+                    SELECT last_displayed, last_correct, correct_count, due_date
+                    FROM card_directions WHERE card_id = ? AND direction = ?
+                ''', (card_id, direction)).fetchone()
+            # A direction without a row yet has never been reviewed
+            stored = dict(zip(SCHEDULING_FIELDS, row or (None, None, 0, None)))
+            for field in SCHEDULING_FIELDS:
+                if card.get(field) != stored[field]:
+                    mismatches.append((key, field, card.get(field), stored[field]))
+        return mismatches
+
+
+def main():
+    """Replay a random session against copies of a database and check the cache.
+
+    The same answers are applied through the cache to one copy and through
+    update_card_status to another; the cache must match the first exactly
+    and agree with the second on counts and due days.
+    """
+    import contextlib
+    import io
+    import random
+    from load_db import get_cards_for_review, update_card_status
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'flashcards.db'
+    source = sqlite3.connect(db_path)
+    cached_conn = sqlite3.connect(':memory:')
+    direct_conn = sqlite3.connect(':memory:')
+    source.backup(cached_conn)
+    source.backup(direct_conn)
+    source.close()
+
+    cache = SessionCardCache(capacity=50, flush_size=7)
+    cards = cache.add_all(get_cards_for_review(cached_conn, directions=('forward', 'reverse')))
+    rng = random.Random(0)
+    for _ in range(500):
+        if not cards:
+            break
+        index = rng.randrange(len(cards))
+        card = cards[index]
+        correct = rng.random() < 0.7
+        cards[index] = cache.record_answer(card, correct)
+        if cache.should_flush():
+            cache.flush(cached_conn)
+        with contextlib.redirect_stdout(io.StringIO()):
+            update_card_status(direct_conn, card['id'], correct, direction=card.get('direction', 'forward'))
+    cache.flush(cached_conn)
+
+    mismatches = cache.verify_against_db(cached_conn)
+
+    query = '''
+        SELECT id, 'forward', correct_count, date(due_date) FROM flashcards
+        UNION ALL
+        SELECT card_id, direction, correct_count, date(due_date) FROM card_directions
+        ORDER BY 1, 2
+    '''
+    direct = cached = None
+    for cached, direct in zip(cached_conn.execute(query), direct_conn.execute(query)):
+        if cached != direct:
+            mismatches.append((cached[:2], 'update_card_status', cached[2:], direct[2:]))
+
+    for mismatch in mismatches:
+        print(f"Mismatch: {mismatch}")
+    print(f"Checked {len(cache)} cached cards: {len(mismatches)} mismatches")
+    cached_conn.close()
+    direct_conn.close()
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
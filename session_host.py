@@ -0,0 +1,235 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from tkinter import PhotoImage, messagebox
+from media import MediaCache
+from migrations import migrate
+
+
+class ImageCache:
+    """Loads each image file once and hands out the shared PhotoImage."""
+
+    def __init__(self, master, image_dir="images"):
+        """Initialize the cache.
+
+        Args:
+            master: Tk widget that owns the images
+            image_dir (str): Directory the image files are loaded from
+        """
+        self.master = master
+        self.image_dir = image_dir
+        self._images = {}
+
+    def get(self, name):
+        """Return the PhotoImage for an image file, loading it on first use."""
+        image = self._images.get(name)
+        if image is None:
+            image = PhotoImage(master=self.master, file=os.path.join(self.image_dir, name))
+            self._images[name] = image
+        return image
+
+
+class ConnectionPool:
+    """A small pool of SQLite connections shared by all sessions in a process.
+
+    Connections are created lazily, so a pool used only from the Tk thread
+    never holds more than one reader connection.
+    """
+
+    def __init__(self, db_path, max_size=4):
+        """Initialize the pool.
+
+        Args:
+            db_path (str): Path to the SQLite database
+            max_size (int): Maximum number of open connections
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self._idle = []
+        self._size = 0
+        self._lock = threading.Condition()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL lets the writer thread commit while sessions keep reading; synchronous=NORMAL drops
+        # the fsync from each commit (see load_db.create_flashcards_db)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def acquire(self):
+        """Take a connection from the pool, opening one if none is idle."""
+        with self._lock:
+            while not self._idle and self._size >= self.max_size:
+                self._lock.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+        try:
+            return self._connect()
+        except sqlite3.Error:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+    def release(self, conn):
+        """Return a connection to the pool."""
+        with self._lock:
+            self._idle.append(conn)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._size -= len(self._idle)
+            self._idle = []
+
+
+class BackgroundWriter:
+    """Runs database writes for every session on a single worker thread."""
+
+    def __init__(self, pool):
+        """Initialize the writer and start its thread.
+
+        Args:
+            pool (ConnectionPool): Pool the writer takes its connection from
+        """
+        self.pool = pool
+        self.errors = queue.Queue()
+        self._tasks = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="flashcard-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, on_error=None, **kwargs):
+        """Queue func(conn, *args, **kwargs) to run on the writer's connection.
+
+        Args:
+            on_error (callable): Called without arguments on the Tk thread if
+                the write fails, e.g. to queue the data again
+        """
+        self._tasks.put((func, args, kwargs, on_error))
+
+    def wait(self):
+        """Block until every queued write has been applied."""
+        self._tasks.join()
+
+    def stop(self):
+        """Apply the remaining writes and stop the worker thread."""
+        self._tasks.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = self.pool.acquire()
+        try:
+            while True:
+                task = self._tasks.get()
+                try:
+                    if task is None:
+                        return
+                    func, args, kwargs, on_error = task
+                    try:
+                        func(conn, *args, **kwargs)
+                    except Exception as e:
+                        print(f"Background write failed: {e}")
+                        self.errors.put((e, on_error))
+                finally:
+                    self._tasks.task_done()
+        finally:
+            self.pool.release(conn)
+
+
+class SessionHost:
+    """Hosts several FlashcardApp sessions as Toplevel windows of one Tk root.
+
+    All sessions share the connection pool, the image and media caches and
+    the background writer, so each extra session only adds its own window and
+    card queue.
+    """
+
+    ERROR_POLL_INTERVAL = 200  # How often writer errors are checked (ms)
+
+    def __init__(self, root, db_path='flashcards.db', image_dir="images", media_dir="media"):
+        """Initialize the host.
+
+        Args:
+            root: The Tk root window the sessions are attached to
+            db_path (str): Path to the SQLite database
+            image_dir (str): Directory containing the card and button images
+            media_dir (str): Directory containing the cards' own images
+        """
+        self.root = root
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
+        with self.pool.connection() as conn:
+            migrate(conn)
+        self.images = ImageCache(root, image_dir)
+        self.media = MediaCache(root, media_dir)
+        self.writer = BackgroundWriter(self.pool)
+        self.sessions = []
+        self._poll_timer = self.root.after(self.ERROR_POLL_INTERVAL, self._poll_errors)
+
+    def open_session(self, **kwargs):
+        """Open a new study session window.
+
+        Args:
+            **kwargs: Passed on to FlashcardApp
+
+        Returns:
+            FlashcardApp: The new session
+        """
+        from flashcard_app import FlashcardApp
+        app = FlashcardApp(db_path=self.db_path, host=self, **kwargs)
+        self.sessions.append(app)
+        return app
+
+    def close_session(self, app):
+        """Close a session window and forget about it."""
+        app.close()
+        if app in self.sessions:
+            self.sessions.remove(app)
+
+    def close(self):
+        """Close all sessions, flush pending writes and release connections."""
+        for app in list(self.sessions):
+            self.close_session(app)
+        if self._poll_timer:
+            self.root.after_cancel(self._poll_timer)
+            self._poll_timer = None
+        self.writer.stop()
+        self.pool.close()
+        self.media.close()
+
+    def report_errors(self):
+        """Handle failed background writes on the Tk thread.
+
+        Runs each failed write's on_error callback and shows the last error.
+        """
+        error = None
+        while True:
+            try:
+                error, on_error = self.writer.errors.get_nowait()
+            except queue.Empty:
+                break
+            if on_error is not None:
+                on_error()
+        if error is not None:
+            messagebox.showerror("Update Error", f"Could not update card status: {error}")
+
+    def _poll_errors(self):
+        """Check for background write failures and schedule the next check."""
+        self.report_errors()
+        self._poll_timer = self.root.after(self.ERROR_POLL_INTERVAL, self._poll_errors)
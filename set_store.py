@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+
+
+# Settings stored in their own columns; everything else goes into the options JSON
+SET_COLUMNS = ('name', 'data_file', 'front_lang', 'back_lang')
+
+DEFAULT_SETS = [
+    {
+        "name": "Italian Vocabulary",
+        "data_file": "data/Italian_500 .csv",
+        "front_lang": "Italian",
+        "back_lang": "English"
+    },
+    {
+        "name": "Example Set (Add your own)",
+        "data_file": "data/your_file.csv",
+        "front_lang": "Front",
+        "back_lang": "Back"
+    }
+]
+
+
+def _split(set_data):
+    """Split a set dict into its column values and the JSON for the remaining options."""
+    options = {key: value for key, value in set_data.items() if key not in SET_COLUMNS and key != 'id'}
+    return tuple(set_data[column] for column in SET_COLUMNS), json.dumps(options, sort_keys=True)
+
+
+def load_sets(conn):
+    """
+    Load all flashcard sets in list order.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    list: Set dicts with id, name, data_file, front_lang, back_lang and any
+        stored options such as directions or learning_steps
+    """
+    sets = []
+    for row in conn.execute('''
+        SELECT id, name, data_file, front_lang, back_lang, options
+        FROM flashcard_sets ORDER BY position, id
+    '''):
+        set_data = json.loads(row[5])
+        set_data.update(zip(('id',) + SET_COLUMNS, row[:5]))
+        sets.append(set_data)
+    return sets
+
+
+def _insert_sets(conn, sets):
+    """Append sets after the last position inside the caller's transaction; return their ids."""
+    position = conn.execute('SELECT COALESCE(MAX(position), -1) FROM flashcard_sets').fetchone()[0]
+    ids = []
+    for set_data in sets:
+        position += 1
+        values, options = _split(set_data)
+        cursor = conn.execute('''
+            INSERT INTO flashcard_sets (position, name, data_file, front_lang, back_lang, options)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (position,) + values + (options,))
+        ids.append(cursor.lastrowid)
+    return ids
+
+
+def add_set(conn, set_data):
+    """
+    Add a flashcard set at the end of the list.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    set_data (dict): Set with name, data_file, front_lang, back_lang and options
+
+    Returns:
+    int: Id of the new set
+    """
+    try:
+        set_id = _insert_sets(conn, [set_data])[0]
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error occurred: {e}")  # Debug
+        conn.rollback()
+        raise e
+    return set_id
+
+
+def update_set(conn, set_id, set_data):
+    """
+    Replace the settings of one flashcard set, keeping its place in the list.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    set_id (int): Id of the set
+    set_data (dict): Set with name, data_file, front_lang, back_lang and options
+    """
+    values, options = _split(set_data)
+    try:
+        conn.execute('''
+            UPDATE flashcard_sets
+            SET name = ?, data_file = ?, front_lang = ?, back_lang = ?, options = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', values + (options, set_id))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error occurred: {e}")  # Debug
+        conn.rollback()
+        raise e
+
+
+def initialize_sets(conn, json_path='flashcard_sets.json'):
+    """
+    Fill an empty set table from the old JSON configuration, or with the default sets.
+
+    Runs in an immediate transaction, so when several launchers start at
+    once only the first one imports. An imported JSON file is renamed with
+    an .imported suffix so it is not mistaken for the live configuration.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    json_path (str): Path to the old flashcard_sets.json
+
+    Returns:
+    int: Number of sets added (0 if the table already had sets)
+    """
+    if conn.execute('SELECT 1 FROM flashcard_sets LIMIT 1').fetchone():
+        return 0
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if conn.execute('SELECT 1 FROM flashcard_sets LIMIT 1').fetchone():
+            conn.rollback()
+            return 0
+        imported = os.path.exists(json_path)
+        if imported:
+            with open(json_path, 'r') as file:
+                sets = json.load(file)
+        else:
+            sets = DEFAULT_SETS
+        _insert_sets(conn, sets)
+        conn.commit()
+    except (sqlite3.Error, OSError, ValueError, KeyError) as e:
+        print(f"Could not initialize flashcard sets: {e}")  # Debug
+        conn.rollback()
+        raise e
+
+    if imported:
+        os.replace(json_path, json_path + '.imported')
+        print(f"Imported {len(sets)} sets from {json_path}")
+    return len(sets)
@@ -0,0 +1,205 @@
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from urllib.request import pathname2url
+
+from load_db import TIMESTAMP_FORMAT, create_flashcards_db, deck_name_for_file, import_from_csv
+
+
+# SQLite's default SQLITE_MAX_ATTACHED, used where Connection.getlimit is missing (Python < 3.11)
+DEFAULT_ATTACH_LIMIT = 10
+
+class ShardCatalog:
+    """Sharded storage: every deck in its own SQLite file, listed in a catalog.
+
+    Each shard is an ordinary flashcards database holding one deck, so a
+    study session, an import, a vacuum or a backup only ever locks that
+    deck's file. FlashcardApp can study a deck by opening its shard path.
+    Cross-deck queries ATTACH the shards to the catalog connection,
+    read-only and as many at a time as SQLite allows, and combine them with
+    UNION ALL.
+    """
+
+    def __init__(self, catalog_path="catalog.db", shard_dir="shards"):
+        """Open (or create) the catalog.
+
+        Args:
+            catalog_path (str): Path to the catalog database
+            shard_dir (str): Directory new shard files are created in
+        """
+        self.catalog_path = catalog_path
+        self.shard_dir = shard_dir
+        self.conn = sqlite3.connect(catalog_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS shards (
+                deck TEXT PRIMARY KEY,
+                file TEXT NOT NULL UNIQUE,          -- Relative to the catalog's directory
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self.conn.commit()
+        if hasattr(self.conn, 'getlimit'):
+            self.attach_limit = self.conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        else:
+            self.attach_limit = DEFAULT_ATTACH_LIMIT
+
+    def _absolute(self, file):
+        return os.path.join(os.path.dirname(os.path.abspath(self.catalog_path)), file)
+
+    def decks(self):
+        """Names of all decks with a shard, sorted."""
+        return [row[0] for row in self.conn.execute('SELECT deck FROM shards ORDER BY deck')]
+
+    def shard_path(self, deck):
+        """Path of a deck's shard file, or None if the deck has no shard."""
+        row = self.conn.execute('SELECT file FROM shards WHERE deck = ?', (deck,)).fetchone()
+        return self._absolute(row[0]) if row else None
+
+    def create_shard(self, deck):
+        """Create and register the shard for a deck, if it does not exist yet.
+
+        Returns:
+            str: Path of the shard file
+        """
+        path = self.shard_path(deck)
+        if path is not None:
+            return path
+
+        os.makedirs(self.shard_dir, exist_ok=True)
+        stem = re.sub(r'[^\w.-]+', '_', deck).strip('_') or 'deck'
+        file = os.path.join(self.shard_dir, f"{stem}.db")
+        suffix = 1
+        while self.conn.execute('SELECT 1 FROM shards WHERE file = ?', (file,)).fetchone():
+            suffix += 1
+            file = os.path.join(self.shard_dir, f"{stem}_{suffix}.db")
+
+        path = self._absolute(file)
+        create_flashcards_db(path).close()
+        self.conn.execute('INSERT INTO shards (deck, file) VALUES (?, ?)', (deck, file))
+        self.conn.commit()
+        return path
+
+    def connect(self, deck):
+        """Open a read-write connection to a deck's shard, creating the shard if needed.
+
+        Returns:
+            sqlite3.Connection: Connection to the shard
+        """
+        return create_flashcards_db(self.create_shard(deck))
+
+    def import_csv(self, csv_file_path, deck=None):
+        """Import a CSV file into its deck's shard; other decks are not locked.
+
+        Returns:
+            int: Number of cards imported, or None if the import failed
+        """
+        deck = deck or deck_name_for_file(csv_file_path)
+        conn = self.connect(deck)
+        try:
+            return import_from_csv(conn, csv_file_path, deck=deck)
+        finally:
+            conn.close()
+
+    def query_all(self, sql, params=(), decks=None):
+        """Run a query against every shard and combine the rows with UNION ALL.
+
+        Shards are attached read-only in groups of at most attach_limit and
+        detached again afterwards.
+
+        Args:
+            sql (str): SELECT with a {shard} placeholder for the schema name,
+                e.g. "SELECT COUNT(*) FROM {shard}.flashcards"
+            params (tuple): Parameters for one copy of sql; repeated per shard
+            decks (list): Decks to include (all decks if None)
+
+        Returns:
+            list: (deck,) + row tuples
+        """
+        decks = self.decks() if decks is None else list(decks)
+        rows = []
+        for start in range(0, len(decks), self.attach_limit):
+            group = decks[start:start + self.attach_limit]
+            aliases = []
+            try:
+                for index, deck in enumerate(group):
+                    alias = f"shard{index}"
+                    uri = f"file:{pathname2url(self.shard_path(deck))}?mode=ro"
+                    self.conn.execute('ATTACH DATABASE ? AS ' + alias, (uri,))
+                    aliases.append(alias)
+                union = ' UNION ALL '.join(
+                    f"SELECT ? AS deck, * FROM ({sql.format(shard=alias)})" for alias in aliases)
+                union_params = []
+                for deck in group:
+                    union_params += [deck, *params]
+                rows += self.conn.execute(union, union_params).fetchall()
+            finally:
+                for alias in aliases:
+                    self.conn.execute('DETACH DATABASE ' + alias)
+        return rows
+
+    def due_counts(self, now=None):
+        """Count the cards due now in each deck (new cards included).
+
+        Returns:
+            dict: deck -> number of due cards
+        """
+        now = (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+        return {deck: count for deck, count in self.query_all(
+            'SELECT COUNT(*) FROM {shard}.flashcards WHERE due_date IS NULL OR due_date <= ?', (now,))}
+
+    def due_cards(self, decks=None, now=None):
+        """Cards due now across decks, as dicts with the same keys as get_cards_for_review.
+
+        Returns:
+            list: Due forward cards from every requested deck
+        """
+        now = (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+        keys = ('deck', 'id', 'target_word', 'native_word', 'last_displayed', 'last_correct',
+                'correct_count', 'due_date')
+        rows = self.query_all('''
+            SELECT id, target_word, native_word, last_displayed, last_correct, correct_count, due_date
+            FROM {shard}.flashcards_with_text WHERE due_date IS NULL OR due_date <= ?
+        ''', (now,), decks)
+        return [dict(zip(keys, row), direction='forward') for row in rows]
+
+    def deck_stats(self):
+        """Trigger-maintained counters of every deck.
+
+        Returns:
+            dict: deck -> (cards, reviews, correct_reviews, streak_days)
+        """
+        return {deck: tuple(stats) for deck, *stats in self.query_all(
+            'SELECT SUM(cards), SUM(reviews), SUM(correct_reviews), MAX(streak_days) FROM {shard}.deck_stats')}
+
+    def close(self):
+        """Close the catalog connection."""
+        self.conn.close()
+
+
+def main():
+    """Usage: python shards.py [import CSV... | due | stats] (catalog.db and shards/ in the current directory)."""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    catalog = ShardCatalog()
+    try:
+        if command == 'import':
+            for csv_file_path in sys.argv[2:]:
+                count = catalog.import_csv(csv_file_path)
+                if count is None:
+                    print(f"Could not import {csv_file_path}")
+                else:
+                    print(f"Imported {count} cards from {csv_file_path}")
+        elif command == 'due':
+            for deck, count in sorted(catalog.due_counts().items()):
+                print(f"{deck:<30} {count:>8}")
+        else:
+            print(f"{'Deck':<30} {'Cards':>8} {'Reviews':>8} {'Correct':>8} {'Streak':>7}")
+            for deck, (cards, reviews, correct, streak) in sorted(catalog.deck_stats().items()):
+                print(f"{deck:<30} {cards or 0:>8} {reviews or 0:>8} {correct or 0:>8} {streak or 0:>7}")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
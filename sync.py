@@ -0,0 +1,273 @@
+import argparse
+import gzip
+import json
+import sqlite3
+import sys
+from datetime import datetime
+
+from load_db import TIMESTAMP_FORMAT, save_review_states
+from migrations import migrate
+from terms import TermStore, content_hash
+
+
+# Version of the batch file layout
+BATCH_FORMAT = 1
+
+# Rows fetched from SQLite per round trip while exporting
+CHUNK_SIZE = 5000
+
+# Fields of each change row in a batch file, in order
+CHANGE_FIELDS = ('content_hash', 'target_word', 'native_word', 'deck', 'direction',
+                 'last_displayed', 'last_correct', 'correct_count', 'due_date')
+
+STATE_FIELDS = ('last_displayed', 'last_correct', 'correct_count', 'due_date')
+
+
+def replica_id(conn):
+    """
+    Get the ID identifying this copy of the database.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    str: Replica ID
+    """
+    return conn.execute('SELECT replica_id FROM sync_state').fetchone()[0]
+
+
+def new_replica_id(conn):
+    """
+    Give this database a new replica ID, e.g. after copying the file to another machine.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+
+    Returns:
+    str: The new replica ID
+    """
+    conn.execute('UPDATE sync_state SET replica_id = lower(hex(randomblob(16)))')
+    conn.execute('DELETE FROM sync_peers')
+    conn.commit()
+    return replica_id(conn)
+
+
+def _state_key(state):
+    """
+    Order two states of the same card direction for merging.
+
+    The most recently displayed state wins; ties fall back to the other
+    fields, so every copy picks the same winner whatever the sync order.
+    """
+    return (state['last_displayed'] or '', state['correct_count'] or 0,
+            state['due_date'] or '', state['last_correct'] or '')
+
+
+def _fill_content_hashes(conn):
+    """Hash cards inserted without a content hash; idx_content_hash keeps this to those rows."""
+    conn.create_function('content_hash', 2, content_hash, deterministic=True)
+    conn.execute('''
+        UPDATE flashcards SET content_hash = content_hash(
+            (SELECT text FROM terms WHERE id = target_term_id),
+            (SELECT text FROM terms WHERE id = native_term_id))
+        WHERE content_hash IS NULL
+    ''')
+    conn.commit()
+
+
+def _iter_changes(conn, since):
+    """Stream change rows (CHANGE_FIELDS order) for card directions changed after a clock value."""
+    cursor = conn.execute('''
+        SELECT f.content_hash, f.target_word, f.native_word, f.deck, c.direction,
+               CASE WHEN c.direction = 'forward' THEN f.last_displayed ELSE d.last_displayed END,
+               CASE WHEN c.direction = 'forward' THEN f.last_correct ELSE d.last_correct END,
+               CASE WHEN c.direction = 'forward' THEN f.correct_count ELSE d.correct_count END,
+               CASE WHEN c.direction = 'forward' THEN f.due_date ELSE d.due_date END
+        FROM card_changes c
+        JOIN flashcards_with_text f ON f.id = c.card_id
+        LEFT JOIN card_directions d ON d.card_id = c.card_id AND d.direction = c.direction
+        WHERE c.version > ?
+        ORDER BY c.version
+    ''', (since,))
+    try:
+        while True:
+            rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def export_changes(conn, path, peer_id=None):
+    """
+    Write the changes a peer has not confirmed yet to a gzipped batch file.
+
+    The batch also tells the peer which of its own changes have been
+    applied here, so its next export can leave them out.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    path (str): Output batch file
+    peer_id (str): Replica the batch is for (everything is sent if None or unknown)
+
+    Returns:
+    int: Number of changed card directions written
+    """
+    _fill_content_hashes(conn)
+    since = 0
+    if peer_id is not None:
+        row = conn.execute('SELECT acked_version FROM sync_peers WHERE peer_id = ?', (peer_id,)).fetchone()
+        since = row[0] if row else 0
+
+    clock = conn.execute('SELECT clock FROM sync_state').fetchone()[0]
+    header = {
+        'format': BATCH_FORMAT,
+        'replica': replica_id(conn),
+        'version': clock,
+        'since': since,
+        'received': dict(conn.execute('SELECT peer_id, received_version FROM sync_peers')),
+    }
+
+    written = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        file.write(json.dumps(header) + '\n')
+        for row in _iter_changes(conn, since):
+            file.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+            written += 1
+    return written
+
+
+def _local_card(conn, term_store, change):
+    """Find the local card for a change by deck and content hash, adding the card if it is new here."""
+    row = conn.execute('SELECT id FROM flashcards WHERE content_hash = ? AND deck IS ?',
+                       (change['content_hash'], change['deck'])).fetchone()
+    if row:
+        return row[0], False
+    target, native = change['target_word'], change['native_word']
+    cursor = conn.execute('''
+        INSERT INTO flashcards (last_displayed, last_correct, correct_count, deck,
+                                target_term_id, native_term_id, content_hash)
+        VALUES (NULL, NULL, 0, ?, ?, ?, ?)
+    ''', (change['deck'], term_store.term_id(target), term_store.term_id(native),
+          change['content_hash']))
+    return cursor.lastrowid, True
+
+
+def _local_state(conn, card_id, direction):
+    if direction == 'forward':
+        row = conn.execute(
+            'SELECT last_displayed, last_correct, correct_count, due_date FROM flashcards WHERE id = ?',
+            (card_id,)).fetchone()
+    else:
+        row = conn.execute('''
+            SELECT last_displayed, last_correct, correct_count, due_date
+            FROM card_directions WHERE card_id = ? AND direction = ?
+        ''', (card_id, direction)).fetchone()
+    return dict(zip(STATE_FIELDS, row or (None, None, 0, None)))
+
+
+def import_changes(conn, path):
+    """
+    Merge a batch file from another copy of the database.
+
+    Cards are matched by deck and content hash; cards new to this copy are
+    added. For each card direction the state that was displayed most
+    recently wins, so merging is deterministic and applying a batch twice
+    changes nothing. States that are already equal are not rewritten, so
+    changes echoed back by a peer stop after one round.
+
+    Parameters:
+    conn (sqlite3.Connection): Database connection
+    path (str): Batch file written by export_changes
+
+    Returns:
+    dict: peer (replica ID), changes (rows read), added (new cards) and
+        updated (card directions whose state changed)
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        header = json.loads(file.readline())
+        if header.get('format') != BATCH_FORMAT:
+            raise ValueError(f"Unsupported sync batch format: {header.get('format')}")
+        peer = header['replica']
+        if peer == replica_id(conn):
+            raise ValueError("Batch comes from a database with the same replica ID; "
+                             "run 'python sync.py new-id' on one of the copies")
+
+        _fill_content_hashes(conn)
+        term_store = TermStore(conn)
+        result = {'peer': peer, 'changes': 0, 'added': 0, 'updated': 0}
+        winners = []
+        try:
+            for line in file:
+                change = dict(zip(CHANGE_FIELDS, json.loads(line)))
+                result['changes'] += 1
+                card_id, added = _local_card(conn, term_store, change)
+                result['added'] += added
+
+                local = _local_state(conn, card_id, change['direction'])
+                remote = {field: change[field] for field in STATE_FIELDS}
+                if local != remote and _state_key(remote) > _state_key(local):
+                    winners.append(dict(remote, id=card_id, direction=change['direction']))
+
+            result['updated'] = len(winners)
+            conn.execute('''
+                INSERT INTO sync_peers (peer_id, received_version, acked_version, last_sync)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (peer_id) DO UPDATE SET
+                    received_version = MAX(received_version, excluded.received_version),
+                    acked_version = MAX(acked_version, excluded.acked_version),
+                    last_sync = excluded.last_sync
+            ''', (peer, header['version'], header['received'].get(replica_id(conn), 0),
+                  datetime.now().strftime(TIMESTAMP_FORMAT)))
+            # Writes the new states and commits the whole batch
+            save_review_states(conn, winners)
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            print(f"Error importing sync batch: {e}")
+            conn.rollback()
+            raise e
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exchange review progress between copies of the database.")
+    parser.add_argument('--db', default='flashcards.db', help="Database path (default: flashcards.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="Write changes not yet confirmed by a peer")
+    export_parser.add_argument('batch', help="Batch file to write, e.g. laptop.sync.gz")
+    export_parser.add_argument('--peer', help="Replica ID of the receiving copy (default: send everything)")
+    import_parser = commands.add_parser('import', help="Merge a batch file from another copy")
+    import_parser.add_argument('batch')
+    commands.add_parser('status', help="Show this copy's replica ID and known peers")
+    commands.add_parser('new-id', help="Give this copy a new replica ID after copying the file")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn, progress=lambda message: None)
+        if args.command == 'export':
+            written = export_changes(conn, args.batch, args.peer)
+            print(f"Wrote {written} changes to {args.batch}")
+        elif args.command == 'import':
+            result = import_changes(conn, args.batch)
+            print(f"Merged {result['changes']} changes from {result['peer']}: "
+                  f"{result['added']} cards added, {result['updated']} updated")
+            print(f"Reply with: python sync.py export BATCH --peer {result['peer']}")
+        elif args.command == 'new-id':
+            print(f"New replica ID: {new_replica_id(conn)}")
+        else:
+            clock = conn.execute('SELECT clock FROM sync_state').fetchone()[0]
+            print(f"Replica {replica_id(conn)}, clock {clock}")
+            for peer, received, acked, last_sync in conn.execute(
+                    'SELECT peer_id, received_version, acked_version, last_sync FROM sync_peers'):
+                print(f"  {peer}: received up to {received}, confirmed ours up to {acked}, "
+                      f"last sync {last_sync}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import unicodedata
+
+
+def normalize_text(text):
+    """
+    Normalize card text for duplicate detection.
+
+    Applies Unicode NFC, collapses runs of whitespace and folds case, so
+    "Grazie", " grazie " and "GRAZIE" count as the same word.
+
+    Parameters:
+    text (str): Card text
+
+    Returns:
+    str: Normalized text
+    """
+    return unicodedata.normalize('NFC', ' '.join(text.split())).casefold()
+
+
+def content_hash(target_word, native_word):
+    """
+    Hash the normalized (target, native) pair of a card.
+
+    Parameters:
+    target_word (str): Word in the language being learned
+    native_word (str): Translation in native language
+
+    Returns:
+    int: Signed 64-bit hash, suitable for an SQLite INTEGER column
+    """
+    key = normalize_text(target_word) + '\x1f' + normalize_text(native_word)
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class TermStore:
+    """
+    Interns card text in the terms table and tracks known card hashes per deck.
+
+    One store can be shared across several imports so the term cache and
+    each deck's hash set are only built once for a bulk load.
+    """
+
+    def __init__(self, conn):
+        """
+        Parameters:
+        conn (sqlite3.Connection): Database connection
+        """
+        self.conn = conn
+        self._term_ids = {}
+        self._hashes = {}  # deck -> set of content hashes
+
+    def term_id(self, text):
+        """
+        Get the ID of a term, adding it to the terms table if it is new.
+
+        Parameters:
+        text (str): Term text
+
+        Returns:
+        int: Term ID
+        """
+        term_id = self._term_ids.get(text)
+        if term_id is None:
+            cursor = self.conn.cursor()
+            cursor.execute('INSERT OR IGNORE INTO terms (text) VALUES (?)', (text,))
+            if cursor.rowcount:
+                term_id = cursor.lastrowid
+            else:
+                cursor.execute('SELECT id FROM terms WHERE text = ?', (text,))
+                term_id = cursor.fetchone()[0]
+            self._term_ids[text] = term_id
+        return term_id
+
+    def reset(self):
+        """Forget cached IDs and hashes, e.g. after a rolled back import."""
+        self._term_ids = {}
+        self._hashes = {}
+
+    def _load_hashes(self, deck):
+        hashes = set()
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT content_hash, target_word, native_word FROM flashcards_with_text WHERE deck IS ?',
+                       (deck,))
+        for stored_hash, target_word, native_word in cursor:
+            # Cards inserted outside the importer may not have a hash yet
+            if stored_hash is None:
+                stored_hash = content_hash(target_word, native_word)
+            hashes.add(stored_hash)
+        return hashes
+
+    def add_card(self, target_word, native_word, deck=None):
+        """
+        Check a card against the deck's known hashes and claim its hash if it is new.
+
+        The same pair may appear in several decks; each deck gets its own card,
+        and the cards share their term rows.
+
+        Parameters:
+        target_word (str): Word in the language being learned
+        native_word (str): Translation in native language
+        deck (str): Deck the card is added to
+
+        Returns:
+        int: The card's content hash, or None if the deck already has the card
+        """
+        hashes = self._hashes.get(deck)
+        if hashes is None:
+            hashes = self._hashes[deck] = self._load_hashes(deck)
+        card_hash = content_hash(target_word, native_word)
+        if card_hash in hashes:
+            return None
+        hashes.add(card_hash)
+        return card_hash
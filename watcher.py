@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import threading
+import time
+
+from load_db import (deck_file_signature, get_deck_file_signatures, import_from_csv,
+                     record_deck_file)
+from terms import TermStore
+
+
+class DeckWatcher:
+    """Background watcher that imports new and edited CSV files from a directory.
+
+    A thread stats the directory's CSV files every POLL_INTERVAL seconds and
+    compares them with a cache of (mtime_ns, size) signatures. The cache
+    starts from the deck_files table, so files unchanged since their last
+    import are never read again. A changed file is imported once its
+    signature has stayed the same for DEBOUNCE seconds, so a burst of saves
+    leads to one import. Works the same on every platform, with no
+    file-system notification dependencies.
+
+    The UI thread reads progress() from an after() poll; completed counts
+    finished imports, so the caller can tell when to refresh.
+    """
+
+    POLL_INTERVAL = 2.0  # Seconds between directory scans
+    DEBOUNCE = 1.0  # Seconds a changed file must stay unchanged before it is imported
+
+    def __init__(self, directory, db_path, poll_interval=None, debounce=None):
+        """Initialize the watcher; call start() to begin watching.
+
+        Args:
+            directory (str): Directory holding the deck CSV files
+            db_path (str): Database the files are imported into
+            poll_interval (float): Seconds between scans (POLL_INTERVAL if None)
+            debounce (float): Quiet period before importing (DEBOUNCE if None)
+        """
+        self.directory = directory
+        self.db_path = db_path
+        self.poll_interval = poll_interval or self.POLL_INTERVAL
+        self.debounce = self.DEBOUNCE if debounce is None else debounce
+        self._signatures = {}  # path -> (mtime_ns, size) of the imported version
+        self._failed = {}  # path -> signature of a version that failed to import
+        self._changed = {}  # path -> (signature, monotonic time it was first seen)
+        self._lock = threading.Lock()
+        self._progress = {'file': None, 'done': 0, 'total': 0, 'completed': 0, 'imported': 0, 'failed': 0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the watcher thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="deck-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the watcher; an import in progress is finished first."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def progress(self):
+        """Snapshot of the watcher's state, safe to call from the UI thread.
+
+        Returns:
+            dict: file (name being imported or None), done and total (files in
+                the current batch), completed (batches finished so far),
+                imported (cards added in the last batch) and failed (files in
+                the last batch that could not be imported)
+        """
+        with self._lock:
+            return dict(self._progress)
+
+    def _scan(self):
+        """Stat the CSV files; return those whose signature differs from the last import.
+
+        A file that failed to import is tried again once it changes.
+        """
+        current = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.lower().endswith('.csv'):
+                        stat = entry.stat()
+                        current[os.path.abspath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return {}
+        # Deleted files are forgotten; their cards stay in the database
+        for cache in (self._signatures, self._failed):
+            for path in list(cache):
+                if path not in current:
+                    del cache[path]
+        return {path: signature for path, signature in current.items()
+                if self._signatures.get(path) != signature and self._failed.get(path) != signature}
+
+    def _due_files(self, changed):
+        """Debounce: return the changed files that have been stable long enough."""
+        now = time.monotonic()
+        for path in list(self._changed):
+            if path not in changed:
+                del self._changed[path]
+        due = []
+        for path, signature in changed.items():
+            seen = self._changed.get(path)
+            if seen is None or seen[0] != signature:
+                self._changed[path] = (signature, now)
+            elif now - seen[1] >= self.debounce:
+                due.append(path)
+        return sorted(due)
+
+    def _import(self, conn, paths):
+        """Import a batch of files with one shared term cache and record their signatures."""
+        with self._lock:
+            self._progress.update(file=None, done=0, total=len(paths), imported=0, failed=0)
+        term_store = TermStore(conn)
+        imported = 0
+        failed = 0
+        for done, path in enumerate(paths):
+            with self._lock:
+                self._progress.update(file=os.path.basename(path), done=done)
+            try:
+                signature = deck_file_signature(path)
+            except OSError:
+                continue  # Deleted since the scan
+            count = import_from_csv(conn, path, term_store=term_store)
+            self._changed.pop(path, None)
+            if count is None:
+                self._failed[path] = signature
+                failed += 1
+                print(f"Could not import {os.path.basename(path)}; it is retried when the file changes")
+                continue
+            # Only a committed import marks this version of the file as done
+            record_deck_file(conn, path, signature)
+            self._signatures[path] = signature
+            self._failed.pop(path, None)
+            imported += count
+            print(f"Imported {count} new flashcards from {os.path.basename(path)}")
+        with self._lock:
+            self._progress.update(file=None, done=len(paths), imported=imported, failed=failed)
+            self._progress['completed'] += 1
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            self._signatures = {path: signature for path, signature in get_deck_file_signatures(conn).items()
+                                if os.path.dirname(path) == os.path.abspath(self.directory)}
+            while True:
+                due = self._due_files(self._scan())
+                if due:
+                    self._import(conn, due)
+                if self._stop.wait(self.debounce if self._changed else self.poll_interval):
+                    break
+        except sqlite3.Error as e:
+            print(f"Deck watcher stopped: {e}")
+        finally:
+            conn.close()